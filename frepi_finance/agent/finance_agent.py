@@ -20,6 +20,7 @@ from frepi_finance.agent.prompt_logger import (
     log_prompt_composition,
     log_prompt_result,
 )
+from frepi_finance.shared import json_utils
 from frepi_finance.tools import ALL_TOOLS, execute_tool
 
 logger = logging.getLogger(__name__)
@@ -137,7 +138,7 @@ class FinanceAgent:
                 tool_name = tool_call.function.name
                 tool_args = json.loads(tool_call.function.arguments)
 
-                logger.info(f"🔧 TOOL CALL: {tool_name}({json.dumps(tool_args, ensure_ascii=False)[:200]})")
+                logger.info(f"🔧 TOOL CALL: {tool_name}({json_utils.dumps(tool_args)[:200]})")
 
                 result = await execute_tool(tool_name, tool_args, session)
                 tool_calls_log.append({
@@ -147,7 +148,7 @@ class FinanceAgent:
 
                 session.messages.append(Message(
                     role="tool",
-                    content=json.dumps(result, ensure_ascii=False),
+                    content=json_utils.dumps(result),
                     tool_call_id=tool_call.id,
                     name=tool_name,
                 ))
@@ -89,6 +89,33 @@ INTENT_PATTERNS = {
     },
 }
 
+def _any_of(sources: list[str]) -> re.Pattern:
+    """One alternation matching wherever any of the patterns would."""
+    return re.compile("|".join(f"(?:{s})" for s in sources))
+
+
+# INTENT_PATTERNS compiled once at import:
+# (intent, phrases, keywords, phrase conf, keyword conf), where phrases and
+# keywords are (any-of regex, ((source, regex), ...)). The any-of regex
+# rejects a non-matching message in one scan; the per-pattern regexes only
+# run on a hit, to report the first pattern in list order.
+_COMPILED_PATTERNS = tuple(
+    (
+        intent_name,
+        (
+            _any_of(patterns["phrases"]),
+            tuple((p, re.compile(p)) for p in patterns["phrases"]),
+        ),
+        (
+            _any_of(patterns["keywords"]),
+            tuple((k, re.compile(k)) for k in patterns["keywords"]),
+        ),
+        patterns["confidence_phrase"],
+        patterns["confidence_keyword"],
+    )
+    for intent_name, patterns in INTENT_PATTERNS.items()
+)
+
 # Menu selection patterns (user picks option 1-4)
 MENU_PATTERNS = {
     "1": "invoice_upload",
@@ -120,35 +147,42 @@ def detect_intent(message: str, has_photo: bool = False, is_new_user: bool = Fal
         logger.info(f"🎯 INTENT: invoice_upload (photo detected)")
         return DetectedIntent(intent="invoice_upload", confidence=0.95, trigger_pattern="photo")
 
-    message_lower = message.lower().strip()
+    stripped = message.strip()
 
-    # Priority 3: Direct menu selection (1, 2, 3, 4)
-    if message_lower in MENU_PATTERNS:
-        intent = MENU_PATTERNS[message_lower]
-        logger.info(f"🎯 INTENT: {intent} (menu selection: {message_lower})")
-        return DetectedIntent(intent=intent, confidence=0.95, trigger_pattern=f"menu_{message_lower}")
+    # Priority 3: Direct menu selection (1, 2, 3, 4). Digits have no case, so
+    # this runs before lowercasing and skips pattern matching entirely.
+    intent = MENU_PATTERNS.get(stripped)
+    if intent:
+        logger.info(f"🎯 INTENT: {intent} (menu selection: {stripped})")
+        return DetectedIntent(intent=intent, confidence=0.95, trigger_pattern=f"menu_{stripped}")
+
+    message_lower = stripped.lower()
 
     # Priority 4: Pattern matching against intent categories
     best_intent = "general"
     best_confidence = 0.0
     best_pattern = None
 
-    for intent_name, patterns in INTENT_PATTERNS.items():
+    for intent_name, phrases, keywords, phrase_conf, keyword_conf in _COMPILED_PATTERNS:
+        phrase_any, phrase_list = phrases
+        keyword_any, keyword_list = keywords
+
         # Check phrases first (higher confidence)
-        for phrase in patterns["phrases"]:
-            if re.search(phrase, message_lower):
-                conf = patterns["confidence_phrase"]
-                if conf > best_confidence:
-                    best_confidence = conf
-                    best_intent = intent_name
-                    best_pattern = phrase
-                break
+        if phrase_any.search(message_lower):
+            for phrase, regex in phrase_list:
+                if regex.search(message_lower):
+                    conf = phrase_conf
+                    if conf > best_confidence:
+                        best_confidence = conf
+                        best_intent = intent_name
+                        best_pattern = phrase
+                    break
 
         # Check keywords
-        if best_intent != intent_name:  # Only if phrase didn't match
-            for keyword in patterns["keywords"]:
-                if re.search(keyword, message_lower):
-                    conf = patterns["confidence_keyword"]
+        if best_intent != intent_name and keyword_any.search(message_lower):
+            for keyword, regex in keyword_list:
+                if regex.search(message_lower):
+                    conf = keyword_conf
                     if conf > best_confidence:
                         best_confidence = conf
                         best_intent = intent_name
@@ -13,6 +13,7 @@ Layers:
   4. Conversation History (managed by agent) - Previous messages
 """
 
+import functools
 import hashlib
 import logging
 import time
@@ -50,13 +51,33 @@ class ComposedPrompt:
     composition_time_ms: int = 0
 
     def compute_hash(self):
-        """Compute SHA256 hash of the final prompt."""
-        self.prompt_hash = hashlib.sha256(self.system_message.encode()).hexdigest()[:16]
+        """Compute a 64-bit BLAKE2b hash (16 hex chars) of the final prompt."""
+        self.prompt_hash = hashlib.blake2b(
+            self.system_message.encode(), digest_size=8
+        ).hexdigest()
 
 
 MAX_CONTEXT_TOKENS = 4000  # Leave room for conversation + response
 
 
+# SOUL and skill prompts are module constants, so their components (content
+# plus token estimate) are built once and shared by every composition.
+# Treat the returned components as read-only.
+@functools.cache
+def _soul_component() -> PromptComponent:
+    """Layer 0 component for the SOUL prompt."""
+    return PromptComponent(name="soul", layer=0, content=SOUL_PROMPT)
+
+
+@functools.cache
+def _skill_component(intent: str) -> Optional[PromptComponent]:
+    """Layer 2 component for an intent's skill prompt, or None if it has none."""
+    skill_prompt = SKILL_PROMPTS.get(intent)
+    if not skill_prompt:
+        return None
+    return PromptComponent(name=f"skill_{intent}", layer=2, content=skill_prompt)
+
+
 def compose_prompt(
     intent: str,
     intent_confidence: float,
@@ -80,12 +101,7 @@ def compose_prompt(
     components: list[PromptComponent] = []
 
     # Layer 0: SOUL (always injected)
-    soul_component = PromptComponent(
-        name="soul",
-        layer=0,
-        content=SOUL_PROMPT,
-    )
-    components.append(soul_component)
+    components.append(_soul_component())
 
     # Layer 1: User Memory (if available)
     if user_memory:
@@ -108,13 +124,9 @@ def compose_prompt(
             ))
 
     # Layer 2: Skill Prompt (based on intent)
-    skill_prompt = SKILL_PROMPTS.get(intent)
-    if skill_prompt:
-        components.append(PromptComponent(
-            name=f"skill_{intent}",
-            layer=2,
-            content=skill_prompt,
-        ))
+    skill_component = _skill_component(intent)
+    if skill_component:
+        components.append(skill_component)
 
     # Layer 3: DB Context (dynamic data)
     if db_context:
@@ -11,6 +11,8 @@ import logging
 from dataclasses import dataclass, field
 from typing import Optional
 
+from frepi_finance.shared.ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +46,9 @@ class SessionMemory:
     current_report_id: Optional[str] = None  # UUID of monthly report being built
     pending_confirmation: Optional[str] = None  # What we're waiting for user to confirm
 
+    # Results of read-only tools, reused when GPT-4 repeats a call
+    tool_cache: TTLCache = field(default_factory=lambda: TTLCache(maxsize=64, ttl=60))
+
     async def get_user_memory(self) -> Optional[dict]:
         """
         Load persistent user memory from DB.
@@ -70,6 +75,7 @@ class SessionMemory:
         self.current_invoice_id = None
         self.current_report_id = None
         self.pending_confirmation = None
+        self.tool_cache.clear()
 
     def add_photo(self, file_url: str):
         """Add a photo URL to the upload queue."""
@@ -3,12 +3,23 @@ CMV Calculator - Compute food cost per menu item.
 """
 
 import logging
+from bisect import bisect_left
 from typing import Optional
 
 from frepi_finance.shared.supabase_client import get_supabase_client, fetch_many, Tables
 
 logger = logging.getLogger(__name__)
 
+# Food cost % upper bounds (inclusive) for each profitability tier
+_TIER_THRESHOLDS = (28.0, 35.0, 40.0)
+_TIERS = ("high", "medium", "low", "negative")
+
+
+def _profitability_tier(food_cost_pct: float) -> str:
+    """Map a food cost percentage to its profitability tier."""
+    # bisect_left keeps each threshold in the lower tier (28% is still "high")
+    return _TIERS[bisect_left(_TIER_THRESHOLDS, food_cost_pct)]
+
 
 async def calculate_menu_item_cost(menu_item_id: str) -> dict:
     """
@@ -78,15 +89,7 @@ async def calculate_menu_item_cost(menu_item_id: str) -> dict:
     # Calculate food cost percentage
     food_cost_pct = (total_cost / sale_price * 100) if sale_price > 0 else 0
 
-    # Determine profitability tier
-    if food_cost_pct > 40:
-        tier = "negative"
-    elif food_cost_pct > 35:
-        tier = "low"
-    elif food_cost_pct > 28:
-        tier = "medium"
-    else:
-        tier = "high"
+    tier = _profitability_tier(food_cost_pct)
 
     # Update menu item with calculated values
     client.table(Tables.MENU_ITEMS).update({
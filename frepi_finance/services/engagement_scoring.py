@@ -8,14 +8,21 @@ import logging
 from typing import Optional
 
 from frepi_finance.shared.supabase_client import get_supabase_client, Tables
+from frepi_finance.shared.time_utils import utcnow_iso
 
 logger = logging.getLogger(__name__)
 
 
-def recalculate_engagement(restaurant_id: int) -> Optional[dict]:
+def recalculate_engagement(
+    restaurant_id: int, increments: Optional[dict[str, int]] = None,
+) -> Optional[dict]:
     """
     Recalculate the engagement score and level for a restaurant.
 
+    `increments` bumps profile counters (e.g. {"total_corrections": 1})
+    before scoring, and the new counters go out in the same update as the
+    score.
+
     Formula:
       score = (
           0.15 * onboarding_depth_signal +
@@ -36,6 +43,11 @@ def recalculate_engagement(restaurant_id: int) -> Optional[dict]:
 
     profile = result.data[0]
 
+    counters = {
+        name: (profile.get(name) or 0) + n for name, n in (increments or {}).items()
+    }
+    profile.update(counters)
+
     depth = profile.get("onboarding_depth", 0)
     depth_signal = {0: 0.0, 5: 0.5, 10: 1.0}.get(depth, 0.0)
 
@@ -73,6 +85,7 @@ def recalculate_engagement(restaurant_id: int) -> Optional[dict]:
         level, drip_per_session = "dormant", 0
 
     client.table(Tables.ENGAGEMENT_PROFILE).update({
+        **counters,
         "engagement_score": score,
         "engagement_level": level,
         "drip_questions_per_session": drip_per_session,
@@ -99,10 +112,8 @@ def increment_session_count(restaurant_id: int):
     ).eq("restaurant_id", restaurant_id).limit(1).execute()
 
     if result.data:
-        from datetime import datetime, timezone
-
         current = result.data[0].get("sessions_last_30d", 0)
         client.table(Tables.ENGAGEMENT_PROFILE).update({
             "sessions_last_30d": current + 1,
-            "last_session_at": datetime.now(timezone.utc).isoformat(),
+            "last_session_at": utcnow_iso(),
         }).eq("restaurant_id", restaurant_id).execute()
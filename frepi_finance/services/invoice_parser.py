@@ -5,6 +5,7 @@ Ported from frepi-agent/frepi_agent/restaurant_facing_agent/subagents/onboarding
 Adapted for the finance agent's invoice processing flow.
 """
 
+import asyncio
 import base64
 import json
 import logging
@@ -16,6 +17,7 @@ import httpx
 from openai import OpenAI
 
 from frepi_finance.config import get_config
+from frepi_finance.shared import json_utils
 
 logger = logging.getLogger(__name__)
 
@@ -98,8 +100,10 @@ async def parse_invoice_image(
         client = get_openai_client()
         config = get_config()
 
-        # Call GPT-4 Vision
-        response = client.chat.completions.create(
+        # Call GPT-4 Vision (sync SDK call, run off the event loop so
+        # several invoices can be parsed concurrently)
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
             model=config.chat_model,
             messages=[
                 {
@@ -323,7 +327,7 @@ def _extract_json(content: str) -> Optional[dict]:
 
     # Try direct JSON parse
     try:
-        return json.loads(content)
+        return json_utils.loads(content)
     except json.JSONDecodeError:
         pass
 
@@ -331,7 +335,7 @@ def _extract_json(content: str) -> Optional[dict]:
     json_match = re.search(r"```(?:json)?\s*\n?(.*?)\n?```", content, re.DOTALL)
     if json_match:
         try:
-            return json.loads(json_match.group(1))
+            return json_utils.loads(json_match.group(1))
         except json.JSONDecodeError:
             pass
 
@@ -340,7 +344,7 @@ def _extract_json(content: str) -> Optional[dict]:
     brace_end = content.rfind("}")
     if brace_start != -1 and brace_end != -1:
         try:
-            return json.loads(content[brace_start:brace_end + 1])
+            return json_utils.loads(content[brace_start:brace_end + 1])
         except json.JSONDecodeError:
             pass
 
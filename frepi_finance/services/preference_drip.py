@@ -7,12 +7,12 @@ based on engagement level.
 
 import logging
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from typing import List, Optional
 
 from frepi_finance.shared.supabase_client import (
     get_supabase_client, Tables, fetch_one, fetch_many, insert_one, update_one,
 )
+from frepi_finance.shared.time_utils import utcnow_iso
 from frepi_finance.services.engagement_scoring import recalculate_engagement
 
 logger = logging.getLogger(__name__)
@@ -60,7 +60,10 @@ class PreferenceDripService:
 
         queue_items = self.client.table(
             Tables.PREFERENCE_COLLECTION_QUEUE
-        ).select("*").eq(
+        ).select(
+            "id, master_list_id, queue_position, importance_tier, "
+            "preferences_pending, asked_count"
+        ).eq(
             "restaurant_id", restaurant_id
         ).in_(
             "preference_status", ["pending", "asked_drip"]
@@ -72,6 +75,7 @@ class PreferenceDripService:
             return []
 
         questions = []
+        now = utcnow_iso()
         for item in queue_items.data:
             product = self.client.table(Tables.MASTER_LIST).select(
                 "id, product_name, brand"
@@ -85,7 +89,7 @@ class PreferenceDripService:
             # Get known preferences
             prefs = self.client.table(
                 Tables.RESTAURANT_PRODUCT_PREFERENCES
-            ).select("*").eq(
+            ).select("brand_preferences, price_preference").eq(
                 "restaurant_id", restaurant_id
             ).eq("master_list_id", item["master_list_id"]).limit(1).execute()
 
@@ -113,7 +117,6 @@ class PreferenceDripService:
             ))
 
             # Mark as asked
-            now = datetime.now(timezone.utc).isoformat()
             self.client.table(Tables.PREFERENCE_COLLECTION_QUEUE).update({
                 "preference_status": "asked_drip",
                 "asked_count": item.get("asked_count", 0) + 1,
@@ -2,12 +2,14 @@
 Price Trend Analysis - Detect and report significant price changes.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
 from frepi_finance.shared.supabase_client import (
     get_supabase_client,
+    execute_async,
     fetch_many,
     fetch_one,
     update_one,
@@ -31,36 +33,46 @@ async def compute_trends_for_invoice(invoice_id: str, restaurant_id: int) -> lis
     """
     client = get_supabase_client()
 
-    # Get line items for this invoice
-    items = client.table(Tables.INVOICE_LINE_ITEMS).select(
-        "id, product_name_raw, unit_price, unit"
-    ).eq("invoice_id", invoice_id).execute()
-
-    # Get the invoice's supplier
-    invoice = client.table(Tables.INVOICES).select(
-        "supplier_name_extracted, invoice_date"
-    ).eq("id", invoice_id).limit(1).execute()
+    # Trends update the stored line items, so this runs after the bulk insert;
+    # within it, every lookup that does not depend on another runs together.
+    items, invoice = await asyncio.gather(
+        # Get line items for this invoice
+        execute_async(client.table(Tables.INVOICE_LINE_ITEMS).select(
+            "id, product_name_raw, unit_price, unit"
+        ).eq("invoice_id", invoice_id)),
+        # Get the invoice's supplier
+        execute_async(client.table(Tables.INVOICES).select(
+            "supplier_name_extracted, invoice_date"
+        ).eq("id", invoice_id).limit(1)),
+    )
 
     if not invoice.data:
         return []
 
     supplier_name = invoice.data[0].get("supplier_name_extracted")
     invoice_date = invoice.data[0].get("invoice_date")
-    trends = []
 
-    for item in (items.data or []):
-        product_name = item.get("product_name_raw")
-        current_price = item.get("unit_price")
-
-        if not product_name or not current_price:
-            continue
+    priced = [
+        item for item in (items.data or [])
+        if item.get("product_name_raw") and item.get("unit_price")
+    ]
 
-        # Find previous price for same product from same supplier
-        prev = client.table(Tables.INVOICE_LINE_ITEMS).select(
+    # Find previous price for same product from same supplier
+    previous = await asyncio.gather(*(
+        execute_async(client.table(Tables.INVOICE_LINE_ITEMS).select(
             "unit_price"
-        ).eq("product_name_raw", product_name).neq(
+        ).eq("product_name_raw", item["product_name_raw"]).neq(
             "invoice_id", invoice_id
-        ).order("created_at", desc=True).limit(1).execute()
+        ).order("created_at", desc=True).limit(1))
+        for item in priced
+    ))
+
+    trends = []
+    updates = []
+
+    for item, prev in zip(priced, previous):
+        product_name = item["product_name_raw"]
+        current_price = item["unit_price"]
 
         if prev.data:
             prev_price = prev.data[0].get("unit_price")
@@ -75,9 +87,9 @@ async def compute_trends_for_invoice(invoice_id: str, restaurant_id: int) -> lis
                     "price_trend": "up" if change_pct > 0 else "down" if change_pct < 0 else "stable",
                     "is_significant_change": is_significant,
                 }
-                client.table(Tables.INVOICE_LINE_ITEMS).update(
+                updates.append(client.table(Tables.INVOICE_LINE_ITEMS).update(
                     update_data
-                ).eq("id", item["id"]).execute()
+                ).eq("id", item["id"]))
 
                 if is_significant:
                     trends.append({
@@ -89,9 +101,11 @@ async def compute_trends_for_invoice(invoice_id: str, restaurant_id: int) -> lis
                     })
         else:
             # First time seeing this product
-            client.table(Tables.INVOICE_LINE_ITEMS).update({
+            updates.append(client.table(Tables.INVOICE_LINE_ITEMS).update({
                 "price_trend": "new",
-            }).eq("id", item["id"]).execute()
+            }).eq("id", item["id"]))
+
+    await asyncio.gather(*(execute_async(u) for u in updates))
 
     return trends
 
@@ -0,0 +1,30 @@
+"""
+JSON helpers that use orjson when it is installed.
+
+orjson is an optional speedup (``pip install frepi-finance[fast]``); the
+stdlib encoder is used otherwise with equivalent output: UTF-8 text kept
+as-is, compact separators. orjson's decode error subclasses
+``json.JSONDecodeError``, so callers can keep catching the stdlib type.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def dumps(obj: Any) -> str:
+    """Serialize ``obj`` to a compact JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse a JSON document."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -5,29 +5,150 @@ Provides connection management and base operations for Frepi Finance tables.
 Shares the same Supabase instance as the procurement agent.
 """
 
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
 from typing import Any, Optional
 
-from supabase import create_client, Client
+import httpx
+from postgrest.exceptions import APIError
+from supabase import create_client, Client, ClientOptions
 
 from frepi_finance.config import get_config
 
+logger = logging.getLogger(__name__)
+
 
 _client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+# Send multi-column fetch_many filters as a single PostgREST logical filter
+# (``or=(and(...))``) instead of one builder call per column. Set to False to
+# fall back to chained eq/in_ filters.
+COMBINE_FILTERS = True
+
+# Characters that must be quoted inside a PostgREST logical filter value
+_POSTGREST_RESERVED = frozenset(',.:()"\\ ')
+
+# Transient HTTP statuses worth retrying (rate limit, unavailable)
+_RETRYABLE_STATUSES = frozenset({429, 503})
+_MAX_RETRIES = 5
+_MAX_BACKOFF_SECONDS = 5.0
+
+# Connection pool for PostgREST calls. Keeps TLS connections alive across the
+# bursts of requests a single tool call can make.
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=30
+)
+_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Column holding the caller-supplied key for idempotent inserts
+IDEMPOTENCY_KEY_COLUMN = "idempotency_key"
 
 
 def get_supabase_client() -> Client:
-    """Get the Supabase client instance."""
+    """
+    Get the process-wide Supabase client instance.
+
+    The client is built once; after that every call is a plain global read.
+    Creation is guarded by a lock so concurrent first calls (e.g. from
+    worker threads) cannot build and discard extra clients.
+    """
     global _client
     if _client is None:
-        config = get_config()
-        _client = create_client(config.supabase_url, config.supabase_key)
+        with _client_lock:
+            if _client is None:
+                config = get_config()
+                _client = create_client(
+                    config.supabase_url,
+                    config.supabase_key,
+                    options=ClientOptions(httpx_client=_build_http_client()),
+                )
     return _client
 
 
+def _build_http_client() -> httpx.Client:
+    """
+    Build the httpx client the Supabase sub-clients share.
+
+    Passed through ``ClientOptions.httpx_client``, so PostgREST keeps using it
+    when supabase-py rebuilds its client after an auth change. Sub-clients
+    send absolute URLs and their own auth headers per request; this client
+    only carries connection settings, matching postgrest-py's defaults
+    (HTTP/2, follow redirects) plus explicit pool limits and timeouts.
+    """
+    return httpx.Client(
+        limits=_HTTP_LIMITS,
+        timeout=_HTTP_TIMEOUT,
+        http2=True,
+        follow_redirects=True,
+        event_hooks={"response": [_raise_if_retryable]},
+    )
+
+
+class RetryableStatusError(APIError):
+    """A PostgREST call answered 429 or 503; ``status`` holds the HTTP status."""
+
+    def __init__(self, status: int, details: str):
+        self.status = status
+        super().__init__({
+            "message": f"HTTP {status}",
+            "code": str(status),
+            "hint": None,
+            "details": details,
+        })
+
+
+def _raise_if_retryable(response: httpx.Response) -> None:
+    """
+    httpx response hook: turn a 429/503 from PostgREST into RetryableStatusError.
+
+    postgrest-py only exposes the error body's ``code``, which for a JSON
+    error (e.g. the gateway's rate-limit reply) is not the HTTP status, so
+    the status is checked here before the body is parsed.
+    """
+    if (
+        response.status_code in _RETRYABLE_STATUSES
+        and "/rest/v1/" in response.request.url.path
+    ):
+        raise RetryableStatusError(response.status_code, response.reason_phrase)
+
+
 def reset_client():
     """Reset the client (useful for testing)."""
     global _client
-    _client = None
+    with _client_lock:
+        _client = None
+
+
+def retry_on_rate_limit(func):
+    """
+    Retry an async DB helper when Supabase answers 429 or 503.
+
+    Backs off exponentially with jitter (100ms, 200ms, 400ms, ... capped at
+    5s) for up to ``_MAX_RETRIES`` retries, then re-raises the last error.
+    A 503 can arrive after the statement committed, so only wrap reads and
+    idempotent writes (updates, upserts, keyed inserts).
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        for attempt in range(_MAX_RETRIES + 1):
+            try:
+                return await func(*args, **kwargs)
+            except RetryableStatusError as e:
+                if attempt == _MAX_RETRIES:
+                    raise
+                delay = min(2 ** attempt * 0.1 + random.random() * 0.1, _MAX_BACKOFF_SECONDS)
+                logger.warning(
+                    f"{func.__name__} got {e.status}, retrying in {delay:.2f}s "
+                    f"({attempt + 1}/{_MAX_RETRIES})"
+                )
+                await asyncio.sleep(delay)
+
+    return wrapper
 
 
 class Tables:
@@ -54,58 +175,192 @@ class Tables:
     PROMPT_COMPOSITION_LOG = "prompt_composition_log"
 
     # Preference & engagement tables (shared across agents)
+    RESTAURANT_PRODUCT_PREFERENCES = "restaurant_product_preferences"
     PREFERENCE_COLLECTION_QUEUE = "preference_collection_queue"
     ENGAGEMENT_PROFILE = "engagement_profile"
     PREFERENCE_CORRECTIONS = "preference_corrections"
 
 
-async def fetch_one(table: str, filters: dict[str, Any]) -> Optional[dict]:
-    """Fetch a single record from a table."""
+async def execute_async(query) -> Any:
+    """
+    Execute a built PostgREST query in a worker thread.
+
+    The supabase-py client is synchronous; running ``execute()`` off the event
+    loop keeps other chats responsive while a request is in flight and lets
+    independent queries proceed concurrently via ``asyncio.gather``. All the
+    async helpers below go through it.
+    """
+    return await asyncio.to_thread(query.execute)
+
+
+@retry_on_rate_limit
+async def fetch_one(
+    table: str,
+    filters: dict[str, Any],
+    columns: str = "*",
+) -> Optional[dict]:
+    """
+    Fetch a single record from a table.
+
+    Pass ``columns`` when the caller only reads a known subset; ``"*"`` is the
+    last-resort default.
+    """
     client = get_supabase_client()
-    query = client.table(table).select("*")
+    query = client.table(table).select(columns)
     for column, value in filters.items():
         query = query.eq(column, value)
-    result = query.limit(1).execute()
+    result = await execute_async(query.limit(1))
     if result.data:
         return result.data[0]
     return None
 
 
+@retry_on_rate_limit
 async def fetch_many(
     table: str,
     filters: Optional[dict[str, Any]] = None,
     order_by: Optional[str] = None,
     limit: Optional[int] = None,
+    columns: str = "*",
 ) -> list[dict]:
-    """Fetch multiple records from a table."""
+    """
+    Fetch multiple records from a table.
+
+    Pass ``columns`` when the caller only reads a known subset; ``"*"`` is the
+    last-resort default.
+    """
     client = get_supabase_client()
-    query = client.table(table).select("*")
-    if filters:
-        for column, value in filters.items():
-            if isinstance(value, list):
-                query = query.in_(column, value)
-            else:
-                query = query.eq(column, value)
+    query = _build_select(client, table, filters, columns)
     if order_by:
-        if order_by.startswith("-"):
-            query = query.order(order_by[1:], desc=True)
-        else:
-            query = query.order(order_by)
+        column, desc = _parse_order_by(order_by)
+        query = query.order(column, desc=desc)
     if limit:
         query = query.limit(limit)
-    result = query.execute()
+    result = await execute_async(query)
     return result.data or []
 
 
+def _build_select(
+    client: Client,
+    table: str,
+    filters: Optional[dict[str, Any]],
+    columns: str = "*",
+):
+    """
+    Build a ``select(columns)`` query with equality / ``in`` filters applied.
+
+    List values become ``in`` filters, None ``is null``, everything else
+    ``eq``. With ``COMBINE_FILTERS`` enabled, two or more filters are sent as
+    one logical filter string. The builder itself is not cached: PostgREST builders
+    mutate in place on each filter.
+    """
+    query = client.table(table).select(columns)
+    if not filters:
+        return query
+    if COMBINE_FILTERS and len(filters) > 1:
+        parts = []
+        for column, value in filters.items():
+            if type(value) is list:
+                values = ",".join(_filter_value(v) for v in value)
+                parts.append(f"{column}.in.({values})")
+            elif value is None:
+                parts.append(f"{column}.is.null")
+            else:
+                parts.append(f"{column}.eq.{_filter_value(value)}")
+        return query.or_(f"and({','.join(parts)})")
+    for column, value in filters.items():
+        if type(value) is list:
+            query = query.in_(column, value)
+        elif value is None:
+            query = query.is_(column, "null")
+        else:
+            query = query.eq(column, value)
+    return query
+
+
+def _filter_value(value: Any) -> str:
+    """Render a value for a PostgREST logical filter, quoting when needed."""
+    if type(value) is bool:
+        return "true" if value else "false"
+    text = str(value)
+    if _POSTGREST_RESERVED.isdisjoint(text):
+        return text
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_order_by(order_by: str) -> tuple[str, bool]:
+    """Split an order spec like ``"-report_year"`` into (column, descending)."""
+    if order_by.startswith("-"):
+        return order_by[1:], True
+    return order_by, False
+
+
 async def insert_one(table: str, data: dict[str, Any]) -> dict:
-    """Insert a single record into a table."""
+    """
+    Insert a single record into a table.
+
+    Sent once: retrying a plain insert after a 503 could duplicate a row that
+    was already committed. Use ``insert_keyed`` for a retryable insert.
+    """
     client = get_supabase_client()
-    result = client.table(table).insert(data).execute()
+    result = await execute_async(client.table(table).insert(data))
     if result.data:
         return result.data[0]
     raise Exception(f"Insert failed: {result}")
 
 
+@retry_on_rate_limit
+async def insert_keyed(
+    table: str, data: dict[str, Any], idempotency_key: str
+) -> tuple[dict, bool]:
+    """
+    Insert-or-fetch a row by its idempotency key.
+
+    The key is written to the table's ``idempotency_key`` column (which must
+    be UNIQUE) and the insert is ``ON CONFLICT DO NOTHING``, so it is retried
+    on rate limiting. Returns ``(row, created)``; ``created`` is False when
+    the key was already stored and the existing row is returned, including
+    when an earlier attempt of this call committed before failing.
+    """
+    client = get_supabase_client()
+    data = {**data, IDEMPOTENCY_KEY_COLUMN: idempotency_key}
+    result = await execute_async(client.table(table).upsert(
+        data, on_conflict=IDEMPOTENCY_KEY_COLUMN, ignore_duplicates=True
+    ))
+    if result.data:
+        return result.data[0], True
+    result = await execute_async(client.table(table).select("*").eq(
+        IDEMPOTENCY_KEY_COLUMN, idempotency_key
+    ).limit(1))
+    if result.data:
+        return result.data[0], False
+    raise Exception(f"Insert failed: {result}")
+
+
+async def insert_many(
+    table: str, rows: list[dict[str, Any]], chunk: int = 500
+) -> list[dict]:
+    """
+    Insert many records, sending up to ``chunk`` rows per request.
+
+    Batches are not retried (see ``insert_one``). Returns all inserted rows.
+    """
+    inserted: list[dict] = []
+    for start in range(0, len(rows), chunk):
+        inserted.extend(await _insert_batch(table, rows[start:start + chunk]))
+    return inserted
+
+
+async def _insert_batch(table: str, rows: list[dict[str, Any]]) -> list[dict]:
+    """Insert one batch of rows in a single request."""
+    client = get_supabase_client()
+    result = await execute_async(client.table(table).insert(rows))
+    return result.data or []
+
+
+@retry_on_rate_limit
 async def update_one(
     table: str, filters: dict[str, Any], data: dict[str, Any]
 ) -> Optional[dict]:
@@ -114,25 +369,57 @@ async def update_one(
     query = client.table(table).update(data)
     for column, value in filters.items():
         query = query.eq(column, value)
-    result = query.execute()
+    result = await execute_async(query)
     if result.data:
         return result.data[0]
     return None
 
 
-async def execute_rpc(function_name: str, params: dict[str, Any]) -> Any:
-    """Execute a Supabase RPC function."""
+@retry_on_rate_limit
+async def upsert_one(
+    table: str, data: dict[str, Any], on_conflict: str
+) -> Optional[dict]:
+    """Insert a record, or update the row that conflicts on ``on_conflict``."""
     client = get_supabase_client()
-    result = client.rpc(function_name, params).execute()
+    result = await execute_async(
+        client.table(table).upsert(data, on_conflict=on_conflict)
+    )
+    if result.data:
+        return result.data[0]
+    return None
+
+
+async def execute_rpc(
+    function_name: str, params: dict[str, Any], read_only: bool = False
+) -> Any:
+    """
+    Execute a Supabase RPC function.
+
+    Pass ``read_only=True`` for functions that don't write, so the call is
+    retried on rate limiting. Writing functions are sent once.
+    """
+    if read_only:
+        return await _execute_rpc_with_retry(function_name, params)
+    return await _execute_rpc(function_name, params)
+
+
+async def _execute_rpc(function_name: str, params: dict[str, Any]) -> Any:
+    client = get_supabase_client()
+    result = await execute_async(client.rpc(function_name, params))
     return result.data
 
 
+_execute_rpc_with_retry = retry_on_rate_limit(_execute_rpc)
+
+
 async def test_connection() -> bool:
-    """Test the database connection."""
+    """Test the database connection with the table-free ``ping()`` RPC."""
     try:
-        client = get_supabase_client()
-        result = client.table(Tables.RESTAURANTS).select("id").limit(1).execute()
-        return True
+        start = time.perf_counter()
+        result = await execute_rpc("ping", {}, read_only=True)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Supabase ping: {elapsed_ms:.1f}ms")
+        return result == 1
     except Exception as e:
         print(f"Connection test failed: {e}")
         return False
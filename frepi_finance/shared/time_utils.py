@@ -0,0 +1,27 @@
+"""
+Date helpers shared by tools that filter on calendar windows.
+"""
+
+import calendar
+from datetime import date, datetime, timezone
+from typing import Optional
+
+
+def months_ago(months: int, today: Optional[date] = None) -> date:
+    """
+    Return the date ``months`` calendar months before ``today``.
+
+    The day is clamped to the last day of the target month, so
+    ``months_ago(1, date(2026, 3, 31))`` is ``date(2026, 2, 28)``.
+    """
+    today = today or date.today()
+    total = today.year * 12 + (today.month - 1) - months
+    year, month = divmod(total, 12)
+    month += 1
+    day = min(today.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def utcnow_iso() -> str:
+    """Return the current UTC time as an ISO 8601 string for timestamp columns."""
+    return datetime.now(timezone.utc).isoformat()
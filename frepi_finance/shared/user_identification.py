@@ -40,13 +40,12 @@ async def identify_finance_user(telegram_chat_id: int) -> FinanceUserIdentificat
         FinanceUserIdentification with user details
     """
     client = get_supabase_client()
-    chat_id_str = str(telegram_chat_id)
 
     # Check finance_onboarding first
     try:
         result = (
             client.table(Tables.FINANCE_ONBOARDING)
-            .select("*")
+            .select("restaurant_id, person_id, person_name, restaurant_name, completed_at")
             .eq("telegram_chat_id", telegram_chat_id)
             .eq("status", "completed")
             .order("completed_at", desc=True)
@@ -70,7 +69,7 @@ async def identify_finance_user(telegram_chat_id: int) -> FinanceUserIdentificat
     try:
         result = (
             client.table(Tables.FINANCE_ONBOARDING)
-            .select("*")
+            .select("restaurant_id, person_name, restaurant_name")
             .eq("telegram_chat_id", telegram_chat_id)
             .eq("status", "in_progress")
             .limit(1)
@@ -88,7 +87,9 @@ async def identify_finance_user(telegram_chat_id: int) -> FinanceUserIdentificat
     except Exception as e:
         logger.warning(f"Error checking in-progress onboarding: {e}")
 
-    # Check restaurant_people table (shared with procurement agent)
+    # Check restaurant_people table (shared with procurement agent).
+    # whatsapp_number is TEXT, so the chat id is only stringified here.
+    chat_id_str = str(telegram_chat_id)
     try:
         result = (
             client.table(Tables.RESTAURANT_PEOPLE)
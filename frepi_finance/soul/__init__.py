@@ -1,4 +1,4 @@
 """SOUL - Agent personality, identity, and behavior system."""
 from .soul import SOUL_PROMPT, SOUL_VERSION
 from .identity import BOT_NAME, BOT_EMOJI, format_brl, format_percent, price_trend_arrow
-from .heartbeat import HEARTBEAT_TASKS, HEARTBEAT_PROMPT
+from .heartbeat import HeartbeatTask, HEARTBEAT_TASKS, HEARTBEAT_PROMPT
@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HeartbeatTask:
     """Definition of a periodic proactive task."""
     name: str
@@ -23,8 +23,8 @@ class HeartbeatTask:
     cron_minute: Optional[int] = None
 
 
-# Define all heartbeat tasks
-HEARTBEAT_TASKS = [
+# Define all heartbeat tasks (immutable, safe to share and cache)
+HEARTBEAT_TASKS: tuple[HeartbeatTask, ...] = (
     HeartbeatTask(
         name="price_watchlist_check",
         description="Check price watchlist for alerts on significant changes or better competitor prices",
@@ -60,7 +60,7 @@ HEARTBEAT_TASKS = [
         schedule_type="interval",
         interval_minutes=120,
     ),
-]
+)
 
 # Heartbeat prompt injected during proactive wake-ups
 HEARTBEAT_PROMPT = """
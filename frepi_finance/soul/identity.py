@@ -2,6 +2,8 @@
 IDENTITY - Bot identity and formatting standards.
 """
 
+import sys
+
 BOT_NAME = "Frepi Financeiro"
 BOT_EMOJI = "📊"
 BOT_SHORT_NAME = "Frepi"
@@ -35,11 +37,16 @@ def format_percent(value: float) -> str:
     """Format a number as percentage with Brazilian decimal separator."""
     return f"{value:.1f}%".replace(".", ",")
 
+# Price trend arrow pieces (changes within ±0.05%, and NaN, render as flat)
+_ZERO_ARROW = sys.intern("➡️ 0%")
+_UP_PREFIX = "📈 +"
+_DOWN_PREFIX = "📉 "
+
 def price_trend_arrow(change_percent: float) -> str:
     """Return an arrow emoji based on price change direction."""
+    # Negated so NaN, which fails every comparison, falls in the flat band
+    if not abs(change_percent) >= 0.05:
+        return _ZERO_ARROW
     if change_percent > 0:
-        return f"📈 +{format_percent(change_percent)}"
-    elif change_percent < 0:
-        return f"📉 {format_percent(change_percent)}"
-    else:
-        return "➡️ 0%"
+        return _UP_PREFIX + format_percent(change_percent)
+    return _DOWN_PREFIX + format_percent(change_percent)
@@ -4,8 +4,11 @@ GPT-4 Function Calling Tools for Frepi Finance Agent.
 Defines all tool schemas and the central dispatcher.
 """
 
-from typing import Any
+import sys
+from types import MappingProxyType
+from typing import Any, Optional
 
+from .arg_models import ToolArgs, parse_args
 from .onboarding_tools import ONBOARDING_TOOLS, execute_onboarding_tool
 from .invoice_tools import INVOICE_TOOLS, execute_invoice_tool
 from .monthly_tools import MONTHLY_TOOLS, execute_monthly_tool
@@ -14,35 +17,56 @@ from .watchlist_tools import WATCHLIST_TOOLS, execute_watchlist_tool
 from .db_tools import DB_TOOLS, execute_db_tool
 from .preference_tools import PREFERENCE_TOOLS, execute_preference_tool
 
-# All tools available to GPT-4
-ALL_TOOLS = (
-    ONBOARDING_TOOLS
-    + INVOICE_TOOLS
-    + MONTHLY_TOOLS
-    + CMV_TOOLS
-    + WATCHLIST_TOOLS
-    + DB_TOOLS
-    + PREFERENCE_TOOLS
+# (tool schemas, executor) per skill, in the order tools are offered to GPT-4
+_GROUPS = (
+    (ONBOARDING_TOOLS, execute_onboarding_tool),
+    (INVOICE_TOOLS, execute_invoice_tool),
+    (MONTHLY_TOOLS, execute_monthly_tool),
+    (CMV_TOOLS, execute_cmv_tool),
+    (WATCHLIST_TOOLS, execute_watchlist_tool),
+    (DB_TOOLS, execute_db_tool),
+    (PREFERENCE_TOOLS, execute_preference_tool),
 )
 
-# Tool name to executor mapping
-_TOOL_EXECUTORS = {}
+# All tools available to GPT-4
+ALL_TOOLS = tuple(tool for tools, _ in _GROUPS for tool in tools)
+
+# Tool name to executor mapping (read-only once built). Keys are interned so
+# lookups with an interned name match on identity.
+_TOOL_EXECUTORS = MappingProxyType({
+    sys.intern(tool["function"]["name"]): executor
+    for tools, executor in _GROUPS
+    for tool in tools
+})
+
+
+# Pure reads whose results can be reused within a session. Any other tool
+# may write, so calling one drops the session's cached results.
+READ_ONLY_TOOLS = frozenset({
+    "get_unprofitable_items",
+    "get_cmv_history",
+    "get_invoice_summary",
+    "get_price_trend",
+    "get_report_history",
+    "get_restaurant_suppliers",
+    "search_products",
+    "get_watchlist",
+})
 
 
-def _register_tools(tools_list, executor):
-    """Register tool names to their executor function."""
-    for tool in tools_list:
-        name = tool["function"]["name"]
-        _TOOL_EXECUTORS[name] = executor
+def _cache_key(tool_name: str, args: ToolArgs) -> Optional[tuple]:
+    """Hashable cache key for a tool call, or None if args are unhashable."""
+    key = (tool_name, args)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
 
 
-_register_tools(ONBOARDING_TOOLS, execute_onboarding_tool)
-_register_tools(INVOICE_TOOLS, execute_invoice_tool)
-_register_tools(MONTHLY_TOOLS, execute_monthly_tool)
-_register_tools(CMV_TOOLS, execute_cmv_tool)
-_register_tools(WATCHLIST_TOOLS, execute_watchlist_tool)
-_register_tools(DB_TOOLS, execute_db_tool)
-_register_tools(PREFERENCE_TOOLS, execute_preference_tool)
+def _tool_failure(error: Exception) -> dict:
+    """Shape an executor exception as a tool result GPT-4 can read."""
+    return {"error": f"Tool execution failed: {str(error)}"}
 
 
 async def execute_tool(tool_name: str, args: dict[str, Any], session) -> dict:
@@ -51,17 +75,41 @@ async def execute_tool(tool_name: str, args: dict[str, Any], session) -> dict:
 
     Args:
         tool_name: The function name from GPT-4
-        args: The parsed arguments
+        args: The JSON-decoded arguments from GPT-4
         session: The SessionMemory for context
 
     Returns:
         Tool result as dict
     """
+    # Names decoded from the GPT-4 response are fresh strings; interning once
+    # here lets every dispatch table and name comparison downstream short-
+    # circuit on identity
+    tool_name = sys.intern(tool_name)
     executor = _TOOL_EXECUTORS.get(tool_name)
     if executor is None:
         return {"error": f"Unknown tool: {tool_name}"}
 
     try:
-        return await executor(tool_name, args, session)
+        parsed = parse_args(tool_name, args)
+    except TypeError as e:
+        return {"error": f"Invalid arguments for {tool_name}: {e}"}
+
+    cache = session.tool_cache
+    key = None
+    if tool_name in READ_ONLY_TOOLS:
+        key = _cache_key(tool_name, parsed)
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            return cached
+    else:
+        cache.clear()
+
+    # Only the await is guarded; on 3.11+ an untaken try block costs nothing.
+    try:
+        result = await executor(tool_name, parsed, session)
     except Exception as e:
-        return {"error": f"Tool execution failed: {str(e)}"}
+        return _tool_failure(e)
+
+    if key is not None and "error" not in result:
+        cache.set(key, result)
+    return result
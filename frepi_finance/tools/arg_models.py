@@ -0,0 +1,226 @@
+"""
+Typed argument models for GPT-4 tool calls.
+
+One frozen, slotted dataclass per tool, mirroring its JSON schema: required
+properties are required fields, optional ones carry the executor's default.
+`parse_args` builds the model once in the dispatcher so executors read plain
+attributes instead of scattering `args.get(...)` defaults.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Any, Optional
+
+
+class ToolArgs:
+    """Base for all tool argument models."""
+    __slots__ = ()
+
+
+@dataclass(frozen=True, slots=True)
+class NoArgs(ToolArgs):
+    """Arguments for tools whose schema has no properties."""
+
+
+# ---------------------------------------------------------------------------
+# Onboarding
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class SaveOnboardingStepArgs(ToolArgs):
+    field: str
+    value: str
+
+
+# ---------------------------------------------------------------------------
+# Invoices
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class ParseInvoicePhotoArgs(ToolArgs):
+    image_url: str
+
+
+@dataclass(frozen=True, slots=True)
+class ParseMultipleInvoicesArgs(ToolArgs):
+    image_urls: list[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ConfirmInvoiceArgs(ToolArgs):
+    invoice_id: str
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceSummaryArgs(ToolArgs):
+    months: int = 3
+
+
+@dataclass(frozen=True, slots=True)
+class PriceTrendArgs(ToolArgs):
+    product_name: str
+    months: int = 6
+
+
+# ---------------------------------------------------------------------------
+# Monthly closure
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class StartMonthlyClosureArgs(ToolArgs):
+    year: Optional[int] = None  # None -> current year
+    month: Optional[int] = None  # None -> previous/current month by day
+
+
+@dataclass(frozen=True, slots=True)
+class SubmitRevenueArgs(ToolArgs):
+    total_revenue: float
+    revenue_source: str = "manual_single"
+    revenue_breakdown: Optional[list[dict]] = None
+
+
+@dataclass(frozen=True, slots=True)
+class ReportHistoryArgs(ToolArgs):
+    months: int = 6
+
+
+# ---------------------------------------------------------------------------
+# CMV
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class AddMenuItemArgs(ToolArgs):
+    item_name: str
+    sale_price: float
+    category: Optional[str] = None
+    description: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class AddIngredientArgs(ToolArgs):
+    menu_item_id: str
+    ingredient_name: str
+    quantity_per_serving: float
+    unit: str
+    waste_percent: float = 0
+
+
+@dataclass(frozen=True, slots=True)
+class MenuItemArgs(ToolArgs):
+    menu_item_id: str
+
+
+@dataclass(frozen=True, slots=True)
+class UnprofitableItemsArgs(ToolArgs):
+    threshold: float = 35.0
+
+
+@dataclass(frozen=True, slots=True)
+class CMVHistoryArgs(ToolArgs):
+    menu_item_id: Optional[str] = None
+    granularity: str = "monthly"
+    months: int = 6
+
+
+# ---------------------------------------------------------------------------
+# Watchlist
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class AddToWatchlistArgs(ToolArgs):
+    product_name: str
+    alert_type: str = "any_change"
+    threshold_percent: Optional[float] = None
+    target_price: Optional[float] = None
+
+
+@dataclass(frozen=True, slots=True)
+class RemoveFromWatchlistArgs(ToolArgs):
+    watchlist_id: str
+
+
+# ---------------------------------------------------------------------------
+# Shared DB
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class SearchProductsArgs(ToolArgs):
+    query: str
+
+
+# ---------------------------------------------------------------------------
+# Preferences
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class EngagementChoiceArgs(ToolArgs):
+    choice: int
+
+
+@dataclass(frozen=True, slots=True)
+class ProductPreferenceArgs(ToolArgs):
+    product_name: str
+    preference_type: str
+    value: str
+
+
+@dataclass(frozen=True, slots=True)
+class DripAnswerArgs(ToolArgs):
+    product_name: str
+    preference_type: str
+    value: Optional[str] = None
+    skip: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class PreferenceCorrectionArgs(ToolArgs):
+    preference_type: str
+    corrected_value: str
+    context: str
+    product_name: Optional[str] = None
+    original_value: Optional[str] = None
+    reason: Optional[str] = None
+
+
+# Tool name -> argument model
+ARG_MODELS: dict[str, type[ToolArgs]] = {
+    "save_onboarding_step": SaveOnboardingStepArgs,
+    "complete_onboarding": NoArgs,
+    "check_existing_user": NoArgs,
+    "parse_invoice_photo": ParseInvoicePhotoArgs,
+    "parse_multiple_invoices": ParseMultipleInvoicesArgs,
+    "confirm_invoice": ConfirmInvoiceArgs,
+    "get_invoice_summary": InvoiceSummaryArgs,
+    "get_price_trend": PriceTrendArgs,
+    "start_monthly_closure": StartMonthlyClosureArgs,
+    "submit_revenue": SubmitRevenueArgs,
+    "generate_monthly_report": NoArgs,
+    "get_report_history": ReportHistoryArgs,
+    "add_menu_item": AddMenuItemArgs,
+    "add_ingredient": AddIngredientArgs,
+    "calculate_food_cost": MenuItemArgs,
+    "get_unprofitable_items": UnprofitableItemsArgs,
+    "get_cmv_history": CMVHistoryArgs,
+    "add_to_watchlist": AddToWatchlistArgs,
+    "remove_from_watchlist": RemoveFromWatchlistArgs,
+    "get_watchlist": NoArgs,
+    "check_watchlist_alerts": NoArgs,
+    "search_products": SearchProductsArgs,
+    "get_restaurant_suppliers": NoArgs,
+    "save_engagement_choice_finance": EngagementChoiceArgs,
+    "save_product_preference_finance": ProductPreferenceArgs,
+    "answer_drip_question": DripAnswerArgs,
+    "save_preference_correction": PreferenceCorrectionArgs,
+}
+
+# Accepted keyword names per tool, resolved once at import
+_FIELD_NAMES: dict[str, frozenset[str]] = {
+    name: frozenset(f.name for f in fields(model))
+    for name, model in ARG_MODELS.items()
+}
+
+
+def parse_args(tool_name: str, args: dict[str, Any]) -> ToolArgs:
+    """
+    Build the argument model for a tool call.
+
+    Keys GPT-4 sends that are not in the schema are dropped. Arguments that
+    are not a JSON object, or miss a required property, raise TypeError,
+    which the dispatcher reports as a tool failure.
+    """
+    if not isinstance(args, dict):
+        raise TypeError(f"expected a JSON object, got {type(args).__name__}")
+    names = _FIELD_NAMES[tool_name]
+    return ARG_MODELS[tool_name](**{k: v for k, v in args.items() if k in names})
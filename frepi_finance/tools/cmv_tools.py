@@ -2,9 +2,14 @@
 CMV (Custo de Mercadoria Vendida) tools - Menu items, ingredients, food cost.
 """
 
-from typing import Any
+from frepi_finance.shared.supabase_client import get_supabase_client, Tables, execute_rpc
+from frepi_finance.shared.time_utils import months_ago
+from frepi_finance.tools.arg_models import ToolArgs
 
-from frepi_finance.shared.supabase_client import get_supabase_client, Tables
+
+# Most menu_cost_history rows get_cmv_history returns. Kept under PostgREST's
+# server-side max-rows (1000) so a cut is detected here rather than silent.
+MAX_HISTORY_ROWS = 500
 
 
 CMV_TOOLS = [
@@ -102,79 +107,87 @@ CMV_TOOLS = [
 ]
 
 
-async def execute_cmv_tool(tool_name: str, args: dict[str, Any], session) -> dict:
+async def execute_cmv_tool(tool_name: str, args: ToolArgs, session) -> dict:
     """Execute a CMV tool."""
 
     if tool_name == "add_menu_item":
         client = get_supabase_client()
         data = {
             "restaurant_id": session.restaurant_id,
-            "item_name": args["item_name"],
-            "sale_price": args["sale_price"],
-            "category": args.get("category"),
-            "item_description": args.get("description"),
+            "item_name": args.item_name,
+            "sale_price": args.sale_price,
+            "category": args.category,
+            "item_description": args.description,
         }
         result = client.table(Tables.MENU_ITEMS).insert(data).execute()
         item = result.data[0] if result.data else None
         return {
             "success": True,
             "menu_item_id": item["id"] if item else None,
-            "item_name": args["item_name"],
-            "sale_price": args["sale_price"],
+            "item_name": args.item_name,
+            "sale_price": args.sale_price,
         }
 
     elif tool_name == "add_ingredient":
         client = get_supabase_client()
         data = {
-            "menu_item_id": args["menu_item_id"],
-            "ingredient_name": args["ingredient_name"],
-            "quantity_per_serving": args["quantity_per_serving"],
-            "unit": args["unit"],
-            "waste_percent": args.get("waste_percent", 0),
+            "menu_item_id": args.menu_item_id,
+            "ingredient_name": args.ingredient_name,
+            "quantity_per_serving": args.quantity_per_serving,
+            "unit": args.unit,
+            "waste_percent": args.waste_percent,
         }
         result = client.table(Tables.MENU_ITEM_INGREDIENTS).insert(data).execute()
         return {
             "success": True,
-            "ingredient": args["ingredient_name"],
-            "quantity": args["quantity_per_serving"],
-            "unit": args["unit"],
+            "ingredient": args.ingredient_name,
+            "quantity": args.quantity_per_serving,
+            "unit": args.unit,
         }
 
     elif tool_name == "calculate_food_cost":
         from frepi_finance.services.cmv_calculator import calculate_menu_item_cost
-        result = await calculate_menu_item_cost(args["menu_item_id"])
+        result = await calculate_menu_item_cost(args.menu_item_id)
         return result
 
     elif tool_name == "get_unprofitable_items":
-        threshold = args.get("threshold", 35.0)
-        client = get_supabase_client()
-        result = client.table(Tables.MENU_ITEMS).select(
-            "id, item_name, sale_price, food_cost, food_cost_percent, profitability_tier"
-        ).eq(
-            "restaurant_id", session.restaurant_id
-        ).eq("is_active", True).gt("food_cost_percent", threshold).order(
-            "food_cost_percent", desc=True
-        ).execute()
+        threshold = args.threshold
+        items = await execute_rpc(
+            "unprofitable_items",
+            {"rid": session.restaurant_id, "thr": threshold},
+            read_only=True,
+        ) or []
 
         return {
             "threshold": threshold,
-            "items": result.data or [],
-            "count": len(result.data or []),
+            "items": items,
+            "count": len(items),
         }
 
     elif tool_name == "get_cmv_history":
         client = get_supabase_client()
-        granularity = args.get("granularity", "monthly")
-        months = args.get("months", 6)
+        granularity = args.granularity
+        months = args.months
+        cutoff = months_ago(months).isoformat()
 
+        # The date cutoff selects the requested window. One extra row beyond
+        # the cap tells whether the window held more than is returned.
         query = client.table(Tables.MENU_COST_HISTORY).select("*").eq(
             "restaurant_id", session.restaurant_id
-        ).eq("granularity", granularity).order("snapshot_date", desc=True).limit(months * 30)
+        ).eq("granularity", granularity).gte(
+            "snapshot_date", cutoff
+        ).order("snapshot_date", desc=True).limit(MAX_HISTORY_ROWS + 1)
 
-        if args.get("menu_item_id"):
-            query = query.eq("menu_item_id", args["menu_item_id"])
+        if args.menu_item_id:
+            query = query.eq("menu_item_id", args.menu_item_id)
 
         result = query.execute()
-        return {"history": result.data or [], "granularity": granularity}
+        history = result.data or []
+        response = {"history": history[:MAX_HISTORY_ROWS], "granularity": granularity}
+        if len(history) > MAX_HISTORY_ROWS:
+            # Newest first, so the cut drops the oldest snapshots
+            response["truncated"] = True
+            response["oldest_returned"] = history[MAX_HISTORY_ROWS - 1].get("snapshot_date")
+        return response
 
     return {"error": f"Unknown CMV tool: {tool_name}"}
@@ -2,9 +2,17 @@
 Database tools - Shared DB operations used across skills.
 """
 
-from typing import Any, Optional
+from typing import Optional
 
-from frepi_finance.shared.supabase_client import get_supabase_client, Tables
+from frepi_finance.shared.supabase_client import get_supabase_client, Tables, execute_rpc
+from frepi_finance.shared.ttl_cache import TTLCache
+from frepi_finance.tools.arg_models import ToolArgs
+
+# Master list is owned by the procurement side and changes slowly; repeated
+# searches while refining one invoice are served from memory. Finance never
+# writes it, so there is nothing here to invalidate on: the TTL bounds how
+# long a procurement-side change can go unseen.
+_MASTER_LIST_CACHE = TTLCache(maxsize=256, ttl=300)
 
 
 DB_TOOLS = [
@@ -37,38 +45,38 @@ DB_TOOLS = [
 ]
 
 
-async def execute_db_tool(tool_name: str, args: dict[str, Any], session) -> dict:
+async def execute_db_tool(tool_name: str, args: ToolArgs, session) -> dict:
     """Execute a DB tool."""
 
     if tool_name == "search_products":
-        result = await search_master_list(args["query"], session.restaurant_id)
+        result = await search_master_list(args.query, session.restaurant_id)
         return result
 
     elif tool_name == "get_restaurant_suppliers":
-        client = get_supabase_client()
-        # Get suppliers from invoices
-        result = client.table(Tables.INVOICES).select(
-            "supplier_name_extracted, supplier_cnpj_extracted, users_seller_id"
-        ).eq("restaurant_id", session.restaurant_id).execute()
-
-        # Deduplicate by supplier name
-        suppliers = {}
-        for inv in (result.data or []):
-            name = inv.get("supplier_name_extracted")
-            if name and name not in suppliers:
-                suppliers[name] = {
-                    "name": name,
-                    "cnpj": inv.get("supplier_cnpj_extracted"),
-                    "seller_id": inv.get("users_seller_id"),
-                }
-
-        return {"suppliers": list(suppliers.values()), "count": len(suppliers)}
+        # Deduplicated server-side by the get_restaurant_suppliers RPC
+        rows = await execute_rpc(
+            "get_restaurant_suppliers", {"rid": session.restaurant_id}, read_only=True
+        ) or []
+        suppliers = [
+            {
+                "name": row["supplier_name_extracted"],
+                "cnpj": row.get("supplier_cnpj_extracted"),
+                "seller_id": row.get("users_seller_id"),
+            }
+            for row in rows
+        ]
+        return {"suppliers": suppliers, "count": len(suppliers)}
 
     return {"error": f"Unknown DB tool: {tool_name}"}
 
 
 async def search_master_list(query: str, restaurant_id: Optional[int] = None) -> dict:
     """Search the master product list by name."""
+    key = (query.lower().strip(), restaurant_id)
+    cached = _MASTER_LIST_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     client = get_supabase_client()
 
     # Simple text search (ilike)
@@ -80,53 +88,50 @@ async def search_master_list(query: str, restaurant_id: Optional[int] = None) ->
         q = q.eq("restaurant_id", restaurant_id)
 
     result = q.execute()
-    return {"products": result.data or [], "count": len(result.data or [])}
+    found = {"products": result.data or [], "count": len(result.data or [])}
+    _MASTER_LIST_CACHE.set(key, found)
+    return found
 
 
 async def get_recent_context(restaurant_id: int, intent: str) -> Optional[str]:
     """Build a context string with recent data relevant to the intent."""
-    client = get_supabase_client()
+    want_invoices = intent in ("invoice_upload", "general")
+    want_watch = intent in ("watchlist", "general")
+    want_report = intent in ("monthly_closure", "general")
+
+    if not (want_invoices or want_watch or want_report):
+        return None
+
+    # One round-trip for all three sections (see migration 011)
+    payload = await execute_rpc("recent_context", {
+        "rid": restaurant_id,
+        "want_invoices": want_invoices,
+        "want_watch": want_watch,
+        "want_report": want_report,
+    }, read_only=True) or {}
     lines = []
 
-    if intent in ("invoice_upload", "general"):
-        # Recent invoices
-        result = client.table(Tables.INVOICES).select(
-            "supplier_name_extracted, invoice_date, total_amount"
-        ).eq("restaurant_id", restaurant_id).order(
-            "invoice_date", desc=True
-        ).limit(5).execute()
-
-        if result.data:
-            lines.append("Ultimas NFs processadas:")
-            for inv in result.data:
-                lines.append(
-                    f"- {inv.get('invoice_date')}: {inv.get('supplier_name_extracted')} - "
-                    f"R$ {inv.get('total_amount', 0):,.2f}"
-                )
-
-    if intent in ("watchlist", "general"):
-        # Active watchlist count
-        result = client.table(Tables.PRODUCT_PRICE_WATCHLIST).select(
-            "id", count="exact"
-        ).eq("restaurant_id", restaurant_id).eq("is_active", True).execute()
-
-        count = len(result.data) if result.data else 0
-        if count > 0:
-            lines.append(f"\nProdutos monitorados: {count}")
-
-    if intent in ("monthly_closure", "general"):
-        # Latest report
-        result = client.table(Tables.MONTHLY_FINANCIAL_REPORTS).select(
-            "report_month, report_year, cmv_percent, status"
-        ).eq("restaurant_id", restaurant_id).order(
-            "report_year", desc=True
-        ).order("report_month", desc=True).limit(1).execute()
-
-        if result.data:
-            r = result.data[0]
+    # Recent invoices
+    invoices = payload.get("invoices")
+    if invoices:
+        lines.append("Ultimas NFs processadas:")
+        for inv in invoices:
             lines.append(
-                f"\nUltimo relatorio: {r['report_month']}/{r['report_year']} - "
-                f"CMV: {r.get('cmv_percent', 'N/A')}% ({r['status']})"
+                f"- {inv.get('invoice_date')}: {inv.get('supplier_name_extracted')} - "
+                f"R$ {inv.get('total_amount') or 0:,.2f}"
             )
 
+    # Active watchlist count
+    count = payload.get("watch_count") or 0
+    if count > 0:
+        lines.append(f"\nProdutos monitorados: {count}")
+
+    # Latest report
+    r = payload.get("latest_report")
+    if r:
+        lines.append(
+            f"\nUltimo relatorio: {r['report_month']}/{r['report_year']} - "
+            f"CMV: {r.get('cmv_percent', 'N/A')}% ({r['status']})"
+        )
+
     return "\n".join(lines) if lines else None
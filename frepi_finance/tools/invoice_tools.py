@@ -2,9 +2,21 @@
 Invoice tools - Parse, store, and analyze invoice data.
 """
 
-from typing import Any
+import asyncio
+import logging
 
-from frepi_finance.shared.supabase_client import get_supabase_client, Tables
+from frepi_finance.shared.supabase_client import (
+    get_supabase_client, Tables, fetch_one, insert_keyed, insert_many, execute_rpc,
+    execute_async,
+)
+from frepi_finance.shared.time_utils import months_ago
+from frepi_finance.tools.arg_models import ToolArgs
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bound on concurrent GPT-4 Vision calls for parse_multiple_invoices
+MAX_CONCURRENT_PARSES = 8
 
 
 INVOICE_TOOLS = [
@@ -103,20 +115,19 @@ INVOICE_TOOLS = [
 ]
 
 
-async def execute_invoice_tool(tool_name: str, args: dict[str, Any], session) -> dict:
+async def execute_invoice_tool(tool_name: str, args: ToolArgs, session) -> dict:
     """Execute an invoice tool."""
 
     if tool_name == "parse_invoice_photo":
         from frepi_finance.services.invoice_parser import parse_invoice_image
 
-        result = await parse_invoice_image(args["image_url"])
+        result = await parse_invoice_image(args.image_url)
         if result:
             # Store parsed invoice in DB
-            client = get_supabase_client()
             invoice_data = {
                 "restaurant_id": session.restaurant_id,
                 "telegram_chat_id": session.telegram_chat_id,
-                "telegram_file_url": args["image_url"],
+                "telegram_file_url": args.image_url,
                 "supplier_name_extracted": result.get("supplier_name"),
                 "supplier_cnpj_extracted": result.get("supplier_cnpj"),
                 "invoice_number": result.get("invoice_number"),
@@ -127,13 +138,36 @@ async def execute_invoice_tool(tool_name: str, args: dict[str, Any], session) ->
                 "raw_extraction_result": result,
             }
 
-            invoice = client.table(Tables.INVOICES).insert(invoice_data).execute()
-            invoice_id = invoice.data[0]["id"] if invoice.data else None
+            # Keyed by chat and photo so a retried insert can't duplicate
+            # the invoice (see migration 006)
+            invoice, created = await insert_keyed(
+                Tables.INVOICES,
+                invoice_data,
+                f"{session.telegram_chat_id}:{args.image_url}",
+            )
+            invoice_id = invoice["id"]
 
-            # Store line items
+            # Same photo already stored with its items: re-inserting them would
+            # duplicate the line items and count their price trends twice. An
+            # existing invoice without items (an earlier attempt failed after
+            # the invoice insert) is completed below.
+            if not created and await fetch_one(
+                Tables.INVOICE_LINE_ITEMS, {"invoice_id": invoice_id}, columns="id"
+            ):
+                session.current_invoice_id = invoice_id
+                return {
+                    "success": True,
+                    "duplicate": True,
+                    "invoice_id": invoice_id,
+                    "supplier": invoice.get("supplier_name_extracted"),
+                    "date": invoice.get("invoice_date"),
+                    "total": invoice.get("total_amount"),
+                }
+
+            # Store line items in a single round-trip
             if invoice_id and result.get("items"):
-                for idx, item in enumerate(result["items"]):
-                    line_data = {
+                line_items = [
+                    {
                         "invoice_id": invoice_id,
                         "product_name_raw": item.get("product_name"),
                         "quantity": item.get("quantity"),
@@ -143,7 +177,9 @@ async def execute_invoice_tool(tool_name: str, args: dict[str, Any], session) ->
                         "extraction_confidence": item.get("confidence", 0.0),
                         "line_index": idx,
                     }
-                    client.table(Tables.INVOICE_LINE_ITEMS).insert(line_data).execute()
+                    for idx, item in enumerate(result["items"])
+                ]
+                await insert_many(Tables.INVOICE_LINE_ITEMS, line_items)
 
             # Compute price trends for line items
             if invoice_id:
@@ -171,48 +207,77 @@ async def execute_invoice_tool(tool_name: str, args: dict[str, Any], session) ->
     elif tool_name == "parse_multiple_invoices":
         from frepi_finance.services.invoice_parser import parse_invoice_image
 
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PARSES)
+
+        async def _parse(url: str):
+            async with semaphore:
+                return await parse_invoice_image(url)
+
+        parsed = await asyncio.gather(
+            *(_parse(url) for url in args.image_urls),
+            return_exceptions=True,
+        )
         results = []
-        for url in args["image_urls"]:
-            result = await parse_invoice_image(url)
-            if result:
-                results.append(result)
+        failed_urls = []
+        for url, outcome in zip(args.image_urls, parsed):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Failed to parse invoice {url[:50]}", exc_info=outcome)
+                failed_urls.append(url)
+            elif outcome:
+                results.append(outcome)
+            else:
+                logger.warning(f"No invoice data parsed from {url[:50]}")
+                failed_urls.append(url)
 
         return {
             "success": True,
             "parsed_count": len(results),
-            "total_sent": len(args["image_urls"]),
+            "total_sent": len(args.image_urls),
+            "failed_count": len(failed_urls),
+            "failed_urls": failed_urls,
             "invoices": results,
         }
 
     elif tool_name == "confirm_invoice":
         client = get_supabase_client()
-        client.table(Tables.INVOICES).update({
+        await execute_async(client.table(Tables.INVOICES).update({
             "status": "confirmed",
             "user_confirmed": True,
-        }).eq("id", args["invoice_id"]).execute()
+        }).eq("id", args.invoice_id))
 
-        return {"success": True, "invoice_id": args["invoice_id"], "status": "confirmed"}
+        return {"success": True, "invoice_id": args.invoice_id, "status": "confirmed"}
 
     elif tool_name == "get_invoice_summary":
         client = get_supabase_client()
-        months = args.get("months", 3)
+        months = args.months
+        # PostgREST compares filter values literally, so the window start
+        # has to be a concrete date rather than an SQL interval expression.
+        cutoff = months_ago(months).isoformat()
 
-        result = client.table(Tables.INVOICES).select(
+        recent = client.table(Tables.INVOICES).select(
             "id, supplier_name_extracted, invoice_date, total_amount, status"
         ).eq(
             "restaurant_id", session.restaurant_id
         ).gte(
-            "invoice_date", f"now() - interval '{months} months'"
-        ).order("invoice_date", desc=True).execute()
+            "invoice_date", cutoff
+        ).order("invoice_date", desc=True).limit(20)
 
-        invoices = result.data or []
-        total = sum(inv.get("total_amount", 0) or 0 for inv in invoices)
+        # Display list and aggregate are independent; fetch them together.
+        result, totals = await asyncio.gather(
+            execute_async(recent),
+            execute_rpc(
+                "invoice_total_since",
+                {"rid": session.restaurant_id, "cutoff": cutoff},
+                read_only=True,
+            ),
+        )
+        summary = totals[0] if totals else {}
 
         return {
-            "invoice_count": len(invoices),
-            "total_amount": total,
+            "invoice_count": summary.get("invoice_count", 0),
+            "total_amount": float(summary.get("total_amount") or 0),
             "months": months,
-            "invoices": invoices[:20],  # Limit to most recent 20
+            "invoices": result.data or [],  # Most recent 20
         }
 
     elif tool_name == "get_price_trend":
@@ -220,8 +285,8 @@ async def execute_invoice_tool(tool_name: str, args: dict[str, Any], session) ->
 
         trends = await get_product_price_trend(
             session.restaurant_id,
-            args["product_name"],
-            args.get("months", 6),
+            args.product_name,
+            args.months,
         )
         return trends
 
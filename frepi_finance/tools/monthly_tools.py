@@ -2,10 +2,10 @@
 Monthly closure tools - Financial reporting and cashflow.
 """
 
-from typing import Any
 from datetime import date
 
-from frepi_finance.shared.supabase_client import get_supabase_client, Tables
+from frepi_finance.shared.supabase_client import get_supabase_client, Tables, execute_rpc
+from frepi_finance.tools.arg_models import ToolArgs
 
 
 MONTHLY_TOOLS = [
@@ -97,13 +97,13 @@ MONTHLY_TOOLS = [
 ]
 
 
-async def execute_monthly_tool(tool_name: str, args: dict[str, Any], session) -> dict:
+async def execute_monthly_tool(tool_name: str, args: ToolArgs, session) -> dict:
     """Execute a monthly closure tool."""
 
     if tool_name == "start_monthly_closure":
         today = date.today()
-        year = args.get("year", today.year)
-        month = args.get("month")
+        year = args.year if args.year is not None else today.year
+        month = args.month
         if month is None:
             # Default to previous month if we're in first 10 days, else current month
             if today.day <= 10:
@@ -113,19 +113,18 @@ async def execute_monthly_tool(tool_name: str, args: dict[str, Any], session) ->
             else:
                 month = today.month
 
-        client = get_supabase_client()
-
-        # Check for existing report
-        result = client.table(Tables.MONTHLY_FINANCIAL_REPORTS).select("*").eq(
-            "restaurant_id", session.restaurant_id
-        ).eq("report_year", year).eq("report_month", month).limit(1).execute()
+        # Get-or-create in one round-trip (see migration 010)
+        report = await execute_rpc(
+            "start_monthly_report",
+            {"rid": session.restaurant_id, "yr": year, "mon": month},
+        )
+        report_id = report["id"] if report else None
+        session.current_report_id = report_id
 
-        if result.data:
-            report = result.data[0]
-            session.current_report_id = report["id"]
+        if report and not report.get("created"):
             return {
                 "exists": True,
-                "report_id": report["id"],
+                "report_id": report_id,
                 "status": report["status"],
                 "year": year,
                 "month": month,
@@ -134,17 +133,6 @@ async def execute_monthly_tool(tool_name: str, args: dict[str, Any], session) ->
                 "cmv_percent": report.get("cmv_percent"),
             }
 
-        # Create new report
-        report_data = {
-            "restaurant_id": session.restaurant_id,
-            "report_year": year,
-            "report_month": month,
-            "status": "awaiting_revenue",
-        }
-        result = client.table(Tables.MONTHLY_FINANCIAL_REPORTS).insert(report_data).execute()
-        report_id = result.data[0]["id"] if result.data else None
-        session.current_report_id = report_id
-
         # Pre-calculate purchases from invoices
         from frepi_finance.services.cashflow import calculate_monthly_purchases
         purchases = await calculate_monthly_purchases(session.restaurant_id, year, month)
@@ -169,20 +157,20 @@ async def execute_monthly_tool(tool_name: str, args: dict[str, Any], session) ->
             return {"error": "No active monthly report. Call start_monthly_closure first."}
 
         update_data = {
-            "total_revenue": args["total_revenue"],
-            "revenue_source": args.get("revenue_source", "manual_single"),
+            "total_revenue": args.total_revenue,
+            "revenue_source": args.revenue_source,
             "status": "complete",
         }
 
-        if args.get("revenue_breakdown"):
-            update_data["revenue_breakdown"] = args["revenue_breakdown"]
+        if args.revenue_breakdown:
+            update_data["revenue_breakdown"] = args.revenue_breakdown
 
         client.table(Tables.MONTHLY_FINANCIAL_REPORTS).update(update_data).eq("id", report_id).execute()
 
         return {
             "success": True,
             "report_id": report_id,
-            "total_revenue": args["total_revenue"],
+            "total_revenue": args.total_revenue,
         }
 
     elif tool_name == "generate_monthly_report":
@@ -196,7 +184,7 @@ async def execute_monthly_tool(tool_name: str, args: dict[str, Any], session) ->
 
     elif tool_name == "get_report_history":
         client = get_supabase_client()
-        months = args.get("months", 6)
+        months = args.months
 
         result = client.table(Tables.MONTHLY_FINANCIAL_REPORTS).select(
             "report_month, report_year, total_revenue, total_purchases, cmv_percent, status"
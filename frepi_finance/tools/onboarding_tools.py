@@ -4,11 +4,36 @@ Onboarding tools - Finance-specific user registration.
 5-step flow: restaurant_name -> person_name -> relationship -> city_state -> savings_opportunity
 """
 
-from typing import Any
+from typing import Final
+
+from postgrest.exceptions import APIError
 
 from frepi_finance.shared.supabase_client import (
-    get_supabase_client, Tables, fetch_one, insert_one, update_one,
+    get_supabase_client, Tables, execute_async, fetch_one, insert_one, update_one,
 )
+from frepi_finance.shared.ttl_cache import TTLCache
+from frepi_finance.tools.arg_models import ToolArgs
+
+# identify_finance_user results per telegram_chat_id. Identity only changes
+# through the onboarding steps below, which invalidate the entry.
+_identity_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Postgres unique_violation: the partial unique index on in-progress sessions
+# (migration 014) rejected a second one for the chat
+_UNIQUE_VIOLATION: Final = "23505"
+
+# Onboarding field just saved -> phase to move to
+_NEXT_PHASE: Final = {
+    "restaurant_name": "person_name",
+    "person_name": "relationship",
+    "is_owner": "city_state",
+    "relationship": "city_state",
+    "city": "savings_opportunity",
+    "state": "savings_opportunity",
+    "savings_opportunity": "invoice_offer",
+    "wants_invoice_upload": "engagement_gauge",
+    "engagement_choice": "completed",
+}
 
 
 ONBOARDING_TOOLS = [
@@ -61,101 +86,117 @@ ONBOARDING_TOOLS = [
 ]
 
 
-async def execute_onboarding_tool(tool_name: str, args: dict[str, Any], session) -> dict:
-    """Execute an onboarding tool."""
-
-    if tool_name == "save_onboarding_step":
-        field_name = args["field"]
-        value = args["value"]
-
-        client = get_supabase_client()
-
-        # Get or create onboarding session
-        result = (
-            client.table(Tables.FINANCE_ONBOARDING)
-            .select("*")
-            .eq("telegram_chat_id", session.telegram_chat_id)
-            .eq("status", "in_progress")
-            .limit(1)
-            .execute()
-        )
-
-        if result.data:
-            # Update existing session
-            session_id = result.data[0]["id"]
-            update_data = {field_name: value}
-
-            # Map field to next phase
-            phase_map = {
-                "restaurant_name": "person_name",
-                "person_name": "relationship",
-                "is_owner": "city_state",
-                "relationship": "city_state",
-                "city": "savings_opportunity",
-                "state": "savings_opportunity",
-                "savings_opportunity": "invoice_offer",
-                "wants_invoice_upload": "engagement_gauge",
-                "engagement_choice": "completed",
-            }
-            if field_name in phase_map:
-                update_data["current_phase"] = phase_map[field_name]
-
-            client.table(Tables.FINANCE_ONBOARDING).update(update_data).eq("id", session_id).execute()
-
-            # Update session memory
-            if field_name == "restaurant_name":
-                session.restaurant_name = value
-            elif field_name == "person_name":
-                session.person_name = value
-
-        else:
-            # Create new session
-            data = {
-                "telegram_chat_id": session.telegram_chat_id,
-                "status": "in_progress",
-                "current_phase": "person_name" if field_name == "restaurant_name" else field_name,
-                field_name: value,
-            }
-
-            # Link to existing restaurant if known
-            if session.restaurant_id:
-                data["restaurant_id"] = session.restaurant_id
-
-            result = client.table(Tables.FINANCE_ONBOARDING).insert(data).execute()
+async def _save_onboarding_step(args: ToolArgs, session) -> dict:
+    """
+    Store one onboarding answer and advance the phase.
+
+    Updates the chat's in-progress session, creating it when there is none.
+    At most one in-progress session per chat is enforced by a partial unique
+    index, so if another instance creates it between the update and the
+    insert, the answer is written to that session instead.
+    """
+    field_name = args.field
+    value = args.value
+
+    update_data = {field_name: value}
+    if field_name in _NEXT_PHASE:
+        update_data["current_phase"] = _NEXT_PHASE[field_name]
+
+    if not await _update_in_progress(session.telegram_chat_id, update_data):
+        data = {
+            "telegram_chat_id": session.telegram_chat_id,
+            "status": "in_progress",
+            "current_phase": "person_name" if field_name == "restaurant_name" else field_name,
+            field_name: value,
+        }
 
-        return {"success": True, "field": field_name, "saved": value}
+        # Link to existing restaurant if known
+        if session.restaurant_id:
+            data["restaurant_id"] = session.restaurant_id
 
-    elif tool_name == "complete_onboarding":
         client = get_supabase_client()
+        try:
+            await execute_async(client.table(Tables.FINANCE_ONBOARDING).insert(data))
+        except APIError as e:
+            if e.code != _UNIQUE_VIOLATION:
+                raise
+            await _update_in_progress(session.telegram_chat_id, update_data)
+
+    # Update session memory
+    if field_name == "restaurant_name":
+        session.restaurant_name = value
+    elif field_name == "person_name":
+        session.person_name = value
+
+    # Any step can change what identify_finance_user reads back
+    _identity_cache.pop(session.telegram_chat_id)
+
+    return {"success": True, "field": field_name, "saved": value}
+
+
+async def _update_in_progress(chat_id: int, update_data: dict) -> bool:
+    """Apply an update to the chat's in-progress session; False if it has none."""
+    client = get_supabase_client()
+    result = await execute_async(
+        client.table(Tables.FINANCE_ONBOARDING)
+        .update(update_data)
+        .eq("telegram_chat_id", chat_id)
+        .eq("status", "in_progress")
+    )
+    return bool(result.data)
+
+
+async def _complete_onboarding(args: ToolArgs, session) -> dict:
+    """Mark the chat's onboarding as completed."""
+    client = get_supabase_client()
+
+    result = await execute_async(
+        client.table(Tables.FINANCE_ONBOARDING)
+        .update({
+            "status": "completed",
+            "current_phase": "completed",
+            "completed_at": "now()",
+        })
+        .eq("telegram_chat_id", session.telegram_chat_id)
+        .eq("status", "in_progress")
+    )
+
+    session.is_new_user = False
+    session.onboarding_complete = True
+    _identity_cache.pop(session.telegram_chat_id)
+
+    return {"success": True, "message": "Onboarding completed"}
+
+
+async def _check_existing_user(args: ToolArgs, session) -> dict:
+    """Look up whether this chat already belongs to a known user."""
+    from frepi_finance.shared.user_identification import identify_finance_user
+
+    identification = _identity_cache.get(session.telegram_chat_id)
+    if identification is None:
+        identification = await identify_finance_user(session.telegram_chat_id)
+        _identity_cache.set(session.telegram_chat_id, identification)
 
-        result = (
-            client.table(Tables.FINANCE_ONBOARDING)
-            .update({
-                "status": "completed",
-                "current_phase": "completed",
-                "completed_at": "now()",
-            })
-            .eq("telegram_chat_id", session.telegram_chat_id)
-            .eq("status", "in_progress")
-            .execute()
-        )
-
-        session.is_new_user = False
-        session.onboarding_complete = True
-
-        return {"success": True, "message": "Onboarding completed"}
+    return {
+        "is_known": identification.is_known,
+        "restaurant_id": identification.restaurant_id,
+        "person_name": identification.person_name,
+        "restaurant_name": identification.restaurant_name,
+        "has_procurement_account": identification.is_known and not identification.onboarding_complete,
+    }
 
-    elif tool_name == "check_existing_user":
-        from frepi_finance.shared.user_identification import identify_finance_user
 
-        identification = await identify_finance_user(session.telegram_chat_id)
+# Tool name -> handler
+_HANDLERS = {
+    "save_onboarding_step": _save_onboarding_step,
+    "complete_onboarding": _complete_onboarding,
+    "check_existing_user": _check_existing_user,
+}
 
-        return {
-            "is_known": identification.is_known,
-            "restaurant_id": identification.restaurant_id,
-            "person_name": identification.person_name,
-            "restaurant_name": identification.restaurant_name,
-            "has_procurement_account": identification.is_known and not identification.onboarding_complete,
-        }
 
-    return {"error": f"Unknown onboarding tool: {tool_name}"}
+async def execute_onboarding_tool(tool_name: str, args: ToolArgs, session) -> dict:
+    """Execute an onboarding tool."""
+    handler = _HANDLERS.get(tool_name)
+    if handler is None:
+        return {"error": f"Unknown onboarding tool: {tool_name}"}
+    return await handler(args, session)
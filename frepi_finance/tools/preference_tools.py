@@ -4,17 +4,42 @@ Preference tools - Finance-specific preference collection and correction.
 Handles engagement gauge, targeted preferences, drip responses, and corrections.
 """
 
-import json
+import asyncio
 import logging
-from datetime import datetime, timezone
-from typing import Any
+import weakref
+from collections import Counter
+from typing import Final
 
+from frepi_finance.shared import json_utils
 from frepi_finance.shared.supabase_client import (
-    get_supabase_client, Tables, fetch_one, insert_one, update_one,
+    get_supabase_client, Tables, execute_async, execute_rpc, fetch_one, insert_one, update_one,
+    upsert_one,
 )
+from frepi_finance.shared.time_utils import utcnow_iso
+from frepi_finance.tools.arg_models import ToolArgs
 
 logger = logging.getLogger(__name__)
 
+# Fire-and-forget engagement recalculations; referenced until done so they
+# are not garbage-collected mid-flight
+_background_tasks: set[asyncio.Task] = set()
+
+# Counter bumps waiting for a restaurant's queued recalculation. While an
+# entry exists a task is already scheduled, so later corrections merge in
+# here instead of queueing their own write.
+_pending_increments: dict[int, Counter] = {}
+# Serializes recalculations per restaurant so their read-modify-writes
+# don't interleave. Weak values let a lock go once no coroutine holds it.
+_recalc_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Engagement choice -> number of products to profile up front
+_DEPTH_MAP: Final = {1: 5, 2: 10, 3: 0}
+# Onboarding depth -> depth signal fed into the initial score
+_DEPTH_SIGNAL: Final = {0: 0.0, 5: 0.5, 10: 1.0}
+# (minimum score, engagement level, drip questions per session), highest first
+_LEVELS: Final = ((0.65, "high", 2), (0.35, "medium", 1), (0.0, "low", 0))
+_CHOICE_LABELS: Final = {1: "Top 5", 2: "Top 10", 3: "Pular"}
+
 
 PREFERENCE_TOOLS = [
     {
@@ -134,158 +159,138 @@ PREFERENCE_TOOLS = [
 ]
 
 
-async def execute_preference_tool(tool_name: str, args: dict[str, Any], session) -> dict:
-    """Execute a preference tool."""
-
-    if tool_name == "save_engagement_choice_finance":
-        return await _save_engagement_choice(args["choice"], session)
-
-    elif tool_name == "save_product_preference_finance":
-        return await _save_product_preference(
-            args["product_name"], args["preference_type"], args["value"], session
-        )
+def _schedule_recalculate(restaurant_id: int, increments: dict[str, int]) -> None:
+    """
+    Queue a counter bump plus engagement recalculation for a restaurant.
+
+    Bursts of corrections coalesce into the already-queued task, which
+    applies the summed counters and the new score in one update.
+    """
+    pending = _pending_increments.get(restaurant_id)
+    if pending is not None:
+        pending.update(increments)
+        return
+
+    _pending_increments[restaurant_id] = Counter(increments)
+    task = asyncio.create_task(_safe_recalculate(restaurant_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _recalc_lock_for(restaurant_id: int) -> asyncio.Lock:
+    """Return the recalculation lock for a restaurant, creating it on first use."""
+    lock = _recalc_locks.get(restaurant_id)
+    if lock is None:
+        lock = _recalc_locks[restaurant_id] = asyncio.Lock()
+    return lock
+
+
+async def _safe_recalculate(restaurant_id: int) -> None:
+    """Recalculate the engagement score off the event loop, logging failures."""
+    async with _recalc_lock_for(restaurant_id):
+        increments = _pending_increments.pop(restaurant_id, None)
+        try:
+            from frepi_finance.services.engagement_scoring import recalculate_engagement
+            await asyncio.to_thread(
+                recalculate_engagement, restaurant_id, dict(increments or {})
+            )
+        except Exception as e:
+            logger.warning(f"Failed to recalculate engagement: {e}")
 
-    elif tool_name == "answer_drip_question":
-        return await _answer_drip_question(
-            args["product_name"],
-            args["preference_type"],
-            args.get("value"),
-            args.get("skip", False),
-            session,
-        )
 
-    elif tool_name == "save_preference_correction":
-        return await _save_preference_correction(
-            args.get("product_name"),
-            args["preference_type"],
-            args.get("original_value"),
-            args["corrected_value"],
-            args.get("reason"),
-            args["context"],
-            session,
-        )
+async def _find_master_list_id(restaurant_id: int, product_name: str) -> int | None:
+    """
+    Resolve a product name to its master_list id.
 
-    return {"error": f"Unknown preference tool: {tool_name}"}
+    Tries a case-insensitive exact match first and falls back to a substring
+    match server-side (see migration 012).
+    """
+    return await execute_rpc(
+        "find_master_list_id", {"rid": restaurant_id, "product": product_name},
+        read_only=True,
+    )
 
 
 async def _save_engagement_choice(choice: int, session) -> dict:
     """Save engagement choice to finance_onboarding."""
     client = get_supabase_client()
-    now = datetime.now(timezone.utc).isoformat()
+    now = utcnow_iso()
 
     # Update finance_onboarding
-    client.table(Tables.FINANCE_ONBOARDING).update({
+    await execute_async(client.table(Tables.FINANCE_ONBOARDING).update({
         "engagement_choice": choice,
         "engagement_choice_at": now,
     }).eq(
         "telegram_chat_id", session.telegram_chat_id
-    ).eq("status", "in_progress").execute()
+    ).eq("status", "in_progress"))
 
     # Create or update engagement_profile if restaurant exists
     if session.restaurant_id:
-        depth_map = {1: 5, 2: 10, 3: 0}
-        onboarding_depth = depth_map.get(choice, 0)
-        depth_signal = {0: 0.0, 5: 0.5, 10: 1.0}.get(onboarding_depth, 0.0)
+        onboarding_depth = _DEPTH_MAP.get(choice, 0)
+        depth_signal = _DEPTH_SIGNAL.get(onboarding_depth, 0.0)
         initial_score = round(0.15 * depth_signal, 2)
 
-        if initial_score >= 0.65:
-            level, drip = "high", 2
-        elif initial_score >= 0.35:
-            level, drip = "medium", 1
-        else:
-            level, drip = "low", 0
+        level, drip = next(
+            (lvl, n) for floor, lvl, n in _LEVELS if initial_score >= floor
+        )
 
-        # Upsert engagement profile
-        existing = await fetch_one(
+        # Upsert engagement profile (one round-trip, no select-then-write race)
+        await upsert_one(
             Tables.ENGAGEMENT_PROFILE,
-            {"restaurant_id": session.restaurant_id},
-        )
-        if existing:
-            await update_one(
-                Tables.ENGAGEMENT_PROFILE,
-                {"restaurant_id": session.restaurant_id},
-                {
-                    "onboarding_depth": onboarding_depth,
-                    "engagement_score": initial_score,
-                    "engagement_level": level,
-                    "drip_questions_per_session": drip,
-                },
-            )
-        else:
-            await insert_one(Tables.ENGAGEMENT_PROFILE, {
+            {
                 "restaurant_id": session.restaurant_id,
                 "onboarding_depth": onboarding_depth,
                 "engagement_score": initial_score,
                 "engagement_level": level,
                 "drip_questions_per_session": drip,
-            })
+            },
+            on_conflict="restaurant_id",
+        )
 
-    choice_labels = {1: "Top 5", 2: "Top 10", 3: "Pular"}
-    return {"success": True, "choice": choice, "label": choice_labels.get(choice, "?")}
+    return {"success": True, "choice": choice, "label": _CHOICE_LABELS.get(choice, "?")}
 
 
 async def _save_product_preference(
     product_name: str, preference_type: str, value: str, session,
+    master_list_id: int | None = None,
 ) -> dict:
-    """Save a single product preference."""
+    """
+    Save a single product preference.
+
+    Pass `master_list_id` when the caller already resolved the product so
+    the RPC skips its own lookup.
+    """
     if not session.restaurant_id:
         return {"error": "No restaurant linked yet"}
 
-    client = get_supabase_client()
-
-    # Find product in master_list
-    result = client.table(Tables.MASTER_LIST).select("id").eq(
-        "restaurant_id", session.restaurant_id
-    ).ilike("product_name", f"%{product_name}%").limit(1).execute()
-
-    master_list_id = result.data[0]["id"] if result.data else None
-
-    if master_list_id:
-        # Build preference update
-        pref_data = {}
-        source = "onboarding"
-        now = datetime.now(timezone.utc).isoformat()
-
-        if preference_type == "brand":
-            pref_data["brand_preferences"] = {"brand": value}
-            pref_data["brand_preferences_source"] = source
-            pref_data["brand_preferences_added_at"] = now
-        elif preference_type == "price_max":
-            pref_data["price_preference"] = value
-            pref_data["price_preference_source"] = source
-            pref_data["price_preference_added_at"] = now
-        elif preference_type == "quality":
-            pref_data["quality_preference"] = {"quality": value}
-            pref_data["quality_preference_source"] = source
-            pref_data["quality_preference_added_at"] = now
-
-        if pref_data:
-            pref_data["restaurant_id"] = session.restaurant_id
-            pref_data["master_list_id"] = master_list_id
-            pref_data["is_active"] = True
-
-            # Upsert
-            existing = client.table(
-                Tables.RESTAURANT_PRODUCT_PREFERENCES
-            ).select("id").eq(
-                "restaurant_id", session.restaurant_id
-            ).eq("master_list_id", master_list_id).limit(1).execute()
-
-            if existing.data:
-                client.table(Tables.RESTAURANT_PRODUCT_PREFERENCES).update(
-                    pref_data
-                ).eq("id", existing.data[0]["id"]).execute()
-            else:
-                client.table(Tables.RESTAURANT_PRODUCT_PREFERENCES).insert(
-                    pref_data
-                ).execute()
-
-        # Update queue status
-        client.table(Tables.PREFERENCE_COLLECTION_QUEUE).update({
-            "preference_status": "collected",
-        }).eq(
-            "restaurant_id", session.restaurant_id
-        ).eq("master_list_id", master_list_id).execute()
+    # Build preference update
+    pref_data = {}
+    source = "onboarding"
+    now = utcnow_iso()
+
+    if preference_type == "brand":
+        pref_data["brand_preferences"] = {"brand": value}
+        pref_data["brand_preferences_source"] = source
+        pref_data["brand_preferences_added_at"] = now
+    elif preference_type == "price_max":
+        pref_data["price_preference"] = value
+        pref_data["price_preference_source"] = source
+        pref_data["price_preference_added_at"] = now
+    elif preference_type == "quality":
+        pref_data["quality_preference"] = {"quality": value}
+        pref_data["quality_preference_source"] = source
+        pref_data["quality_preference_added_at"] = now
+
+    # Product lookup, preference upsert and queue update run as one
+    # transaction server-side (see migration 012)
+    params = {
+        "rid": session.restaurant_id,
+        "product": product_name,
+        "prefs": pref_data,
+    }
+    if master_list_id is not None:
+        params["ml"] = master_list_id
+    await execute_rpc("save_product_preference", params)
 
     return {
         "success": True,
@@ -308,6 +313,9 @@ async def _answer_drip_question(
 
     client = get_supabase_client()
 
+    # Resolved once and shared by the save and skip paths
+    master_list_id = await _find_master_list_id(session.restaurant_id, product_name)
+
     # Update engagement profile counters
     profile = await fetch_one(
         Tables.ENGAGEMENT_PROFILE,
@@ -315,45 +323,33 @@ async def _answer_drip_question(
     )
 
     if profile:
+        # All counters live on the same row: one write instead of two
+        updates = {"drip_questions_asked": profile["drip_questions_asked"] + 1}
         if skip:
-            await update_one(
-                Tables.ENGAGEMENT_PROFILE,
-                {"restaurant_id": session.restaurant_id},
-                {"drip_questions_skipped": profile["drip_questions_skipped"] + 1},
-            )
+            updates["drip_questions_skipped"] = profile["drip_questions_skipped"] + 1
         else:
-            await update_one(
-                Tables.ENGAGEMENT_PROFILE,
-                {"restaurant_id": session.restaurant_id},
-                {"drip_questions_answered": profile["drip_questions_answered"] + 1},
-            )
-
-        # Increment asked counter
+            updates["drip_questions_answered"] = profile["drip_questions_answered"] + 1
         await update_one(
             Tables.ENGAGEMENT_PROFILE,
             {"restaurant_id": session.restaurant_id},
-            {"drip_questions_asked": profile["drip_questions_asked"] + 1},
+            updates,
         )
 
     if not skip and value:
         # Save the actual preference
         return await _save_product_preference(
-            product_name, preference_type, value, session
+            product_name, preference_type, value, session, master_list_id
         )
 
     # Update queue status to skipped
-    result = client.table(Tables.MASTER_LIST).select("id").eq(
-        "restaurant_id", session.restaurant_id
-    ).ilike("product_name", f"%{product_name}%").limit(1).execute()
-
-    if result.data:
-        client.table(Tables.PREFERENCE_COLLECTION_QUEUE).update({
+    if master_list_id:
+        await execute_async(client.table(Tables.PREFERENCE_COLLECTION_QUEUE).update({
             "preference_status": "skipped",
             "asked_count": (profile or {}).get("drip_questions_asked", 0) + 1,
-            "last_asked_at": datetime.now(timezone.utc).isoformat(),
+            "last_asked_at": utcnow_iso(),
         }).eq(
             "restaurant_id", session.restaurant_id
-        ).eq("master_list_id", result.data[0]["id"]).execute()
+        ).eq("master_list_id", master_list_id))
 
     return {"success": True, "skipped": True, "product": product_name}
 
@@ -371,24 +367,18 @@ async def _save_preference_correction(
     if not session.restaurant_id:
         return {"error": "No restaurant linked"}
 
-    client = get_supabase_client()
-
     # Find master_list_id if product given
     master_list_id = None
     if product_name:
-        result = client.table(Tables.MASTER_LIST).select("id").eq(
-            "restaurant_id", session.restaurant_id
-        ).ilike("product_name", f"%{product_name}%").limit(1).execute()
-        if result.data:
-            master_list_id = result.data[0]["id"]
+        master_list_id = await _find_master_list_id(session.restaurant_id, product_name)
 
     # Insert correction record
     correction_data = {
         "restaurant_id": session.restaurant_id,
         "master_list_id": master_list_id,
         "preference_type": preference_type,
-        "original_value": json.dumps(original_value) if original_value else None,
-        "corrected_value": json.dumps(corrected_value),
+        "original_value": json_utils.dumps(original_value) if original_value else None,
+        "corrected_value": json_utils.dumps(corrected_value),
         "correction_reason": reason,
         "correction_context": context,
     }
@@ -397,35 +387,20 @@ async def _save_preference_correction(
     if hasattr(session, "person_id") and session.person_id:
         correction_data["person_id"] = session.person_id
 
-    await insert_one(Tables.PREFERENCE_CORRECTIONS, correction_data)
-
-    # Update the actual preference
+    # The correction insert and the preference save are independent
+    pending = [insert_one(Tables.PREFERENCE_CORRECTIONS, correction_data)]
     if master_list_id:
-        await _save_product_preference(
-            product_name, preference_type, corrected_value, session
-        )
-
-    # Update engagement profile
-    profile = await fetch_one(
-        Tables.ENGAGEMENT_PROFILE,
-        {"restaurant_id": session.restaurant_id},
-    )
-    if profile:
-        updates = {"total_corrections": profile["total_corrections"] + 1}
-        if reason:
-            updates["corrections_with_reason"] = profile["corrections_with_reason"] + 1
-        await update_one(
-            Tables.ENGAGEMENT_PROFILE,
-            {"restaurant_id": session.restaurant_id},
-            updates,
-        )
-
-    # Recalculate engagement score after correction
-    try:
-        from frepi_finance.services.engagement_scoring import recalculate_engagement
-        recalculate_engagement(session.restaurant_id)
-    except Exception as e:
-        logger.warning(f"Failed to recalculate engagement: {e}")
+        pending.append(_save_product_preference(
+            product_name, preference_type, corrected_value, session, master_list_id
+        ))
+    await asyncio.gather(*pending)
+
+    # Counter bumps and the score recalculation go out as one background
+    # update; the reply doesn't need either
+    increments = {"total_corrections": 1}
+    if reason:
+        increments["corrections_with_reason"] = 1
+    _schedule_recalculate(session.restaurant_id, increments)
 
     return {
         "success": True,
@@ -434,3 +409,34 @@ async def _save_preference_correction(
         "corrected_to": corrected_value,
         "has_reason": bool(reason),
     }
+
+
+# Tool name -> handler, adapting parsed args to each helper's signature
+_HANDLERS = {
+    "save_engagement_choice_finance": lambda args, session: _save_engagement_choice(
+        args.choice, session
+    ),
+    "save_product_preference_finance": lambda args, session: _save_product_preference(
+        args.product_name, args.preference_type, args.value, session
+    ),
+    "answer_drip_question": lambda args, session: _answer_drip_question(
+        args.product_name, args.preference_type, args.value, args.skip, session
+    ),
+    "save_preference_correction": lambda args, session: _save_preference_correction(
+        args.product_name,
+        args.preference_type,
+        args.original_value,
+        args.corrected_value,
+        args.reason,
+        args.context,
+        session,
+    ),
+}
+
+
+async def execute_preference_tool(tool_name: str, args: ToolArgs, session) -> dict:
+    """Execute a preference tool."""
+    handler = _HANDLERS.get(tool_name)
+    if handler is None:
+        return {"error": f"Unknown preference tool: {tool_name}"}
+    return await handler(args, session)
@@ -2,9 +2,10 @@
 Watchlist tools - Price monitoring and alerts.
 """
 
-from typing import Any
-
-from frepi_finance.shared.supabase_client import get_supabase_client, Tables
+from frepi_finance.shared.supabase_client import (
+    get_supabase_client, Tables, execute_async, execute_rpc,
+)
+from frepi_finance.tools.arg_models import ToolArgs
 
 
 WATCHLIST_TOOLS = [
@@ -70,70 +71,83 @@ WATCHLIST_TOOLS = [
 ]
 
 
-async def execute_watchlist_tool(tool_name: str, args: dict[str, Any], session) -> dict:
-    """Execute a watchlist tool."""
-
-    if tool_name == "add_to_watchlist":
-        # First, find the product in master_list
-        from frepi_finance.tools.db_tools import search_master_list
-        search_result = await search_master_list(args["product_name"], session.restaurant_id)
-
-        if not search_result.get("products"):
-            return {"error": f"Produto '{args['product_name']}' nao encontrado na lista mestre."}
-
-        product = search_result["products"][0]
-        master_list_id = product["id"]
-
-        client = get_supabase_client()
-        data = {
-            "restaurant_id": session.restaurant_id,
-            "master_list_id": master_list_id,
-            "alert_type": args.get("alert_type", "any_change"),
-            "threshold_percent": args.get("threshold_percent"),
-            "target_price": args.get("target_price"),
-            "is_active": True,
+async def _add_to_watchlist(args: ToolArgs, session) -> dict:
+    """Add a master list product to the price watchlist."""
+    # Product lookup and insert in one round-trip (see migration 013)
+    entry = await execute_rpc("add_to_watchlist", {
+        "rid": session.restaurant_id,
+        "product": args.product_name,
+        "alert": args.alert_type,
+        "threshold": args.threshold_percent,
+        "target": args.target_price,
+    })
+
+    if not entry:
+        return {"error": f"Produto '{args.product_name}' nao encontrado na lista mestre."}
+
+    return {
+        "success": True,
+        "watchlist_id": entry["watchlist_id"],
+        "product_name": entry["product_name"],
+        "alert_type": args.alert_type,
+    }
+
+
+async def _remove_from_watchlist(args: ToolArgs, session) -> dict:
+    """Deactivate a watchlist entry."""
+    client = get_supabase_client()
+    await execute_async(client.table(Tables.PRODUCT_PRICE_WATCHLIST).update(
+        {"is_active": False}
+    ).eq("id", args.watchlist_id))
+    return {"success": True, "removed": args.watchlist_id}
+
+
+async def _get_watchlist(args: ToolArgs, session) -> dict:
+    """List the restaurant's active watchlist entries."""
+    client = get_supabase_client()
+    result = await execute_async(client.table(Tables.PRODUCT_PRICE_WATCHLIST).select(
+        "id, alert_type, current_price, target_price, threshold_percent, "
+        "best_competitor_price, master_list(product_name)"
+    ).eq(
+        "restaurant_id", session.restaurant_id
+    ).eq("is_active", True))
+
+    items = [
+        {
+            "id": it["id"],
+            # The embed is null when the master_list row is gone
+            "product_name": (it.get("master_list") or {}).get("product_name", "Unknown"),
+            "alert_type": it["alert_type"],
+            "current_price": it.get("current_price"),
+            "target_price": it.get("target_price"),
+            "threshold_percent": it.get("threshold_percent"),
+            "best_competitor_price": it.get("best_competitor_price"),
         }
-        result = client.table(Tables.PRODUCT_PRICE_WATCHLIST).insert(data).execute()
+        for it in (result.data or [])
+    ]
+
+    return {"items": items, "count": len(items)}
 
-        return {
-            "success": True,
-            "watchlist_id": result.data[0]["id"] if result.data else None,
-            "product_name": product.get("product_name", args["product_name"]),
-            "alert_type": data["alert_type"],
-        }
 
-    elif tool_name == "remove_from_watchlist":
-        client = get_supabase_client()
-        client.table(Tables.PRODUCT_PRICE_WATCHLIST).update(
-            {"is_active": False}
-        ).eq("id", args["watchlist_id"]).execute()
-        return {"success": True, "removed": args["watchlist_id"]}
-
-    elif tool_name == "get_watchlist":
-        client = get_supabase_client()
-        result = client.table(Tables.PRODUCT_PRICE_WATCHLIST).select(
-            "*, master_list(product_name)"
-        ).eq(
-            "restaurant_id", session.restaurant_id
-        ).eq("is_active", True).execute()
-
-        items = []
-        for item in (result.data or []):
-            items.append({
-                "id": item["id"],
-                "product_name": item.get("master_list", {}).get("product_name", "Unknown"),
-                "alert_type": item["alert_type"],
-                "current_price": item.get("current_price"),
-                "target_price": item.get("target_price"),
-                "threshold_percent": item.get("threshold_percent"),
-                "best_competitor_price": item.get("best_competitor_price"),
-            })
-
-        return {"items": items, "count": len(items)}
-
-    elif tool_name == "check_watchlist_alerts":
-        from frepi_finance.services.price_trend import check_watchlist_for_alerts
-        alerts = await check_watchlist_for_alerts(session.restaurant_id)
-        return {"alerts": alerts, "count": len(alerts)}
-
-    return {"error": f"Unknown watchlist tool: {tool_name}"}
+async def _check_watchlist_alerts(args: ToolArgs, session) -> dict:
+    """Check the watchlist for price alerts."""
+    from frepi_finance.services.price_trend import check_watchlist_for_alerts
+    alerts = await check_watchlist_for_alerts(session.restaurant_id)
+    return {"alerts": alerts, "count": len(alerts)}
+
+
+# Tool name -> handler
+_HANDLERS = {
+    "add_to_watchlist": _add_to_watchlist,
+    "remove_from_watchlist": _remove_from_watchlist,
+    "get_watchlist": _get_watchlist,
+    "check_watchlist_alerts": _check_watchlist_alerts,
+}
+
+
+async def execute_watchlist_tool(tool_name: str, args: ToolArgs, session) -> dict:
+    """Execute a watchlist tool."""
+    handler = _HANDLERS.get(tool_name)
+    if handler is None:
+        return {"error": f"Unknown watchlist tool: {tool_name}"}
+    return await handler(args, session)
@@ -0,0 +1,20 @@
+-- ============================================================================
+-- Migration 005: Liveness Ping
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - ping() : Constant-returning RPC used by health checks
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- PING
+-- Lets `frepi-finance test` and other health checks probe PostgREST without
+-- touching a table (no RLS evaluation, no row fetch).
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.ping()
+RETURNS INTEGER
+LANGUAGE sql
+IMMUTABLE
+AS 'SELECT 1';
+
+GRANT EXECUTE ON FUNCTION public.ping() TO anon, authenticated, service_role;
@@ -0,0 +1,40 @@
+-- ============================================================================
+-- Migration 008: Unprofitable Items RPC
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - unprofitable_items(rid, thr) : Active menu items above a food cost %
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- UNPROFITABLE ITEMS
+-- Backs the get_unprofitable_items tool. A SQL function keeps one cached plan
+-- instead of PostgREST re-parsing the chained filters on every call, and
+-- returns only the columns the tool reports.
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.unprofitable_items(rid INTEGER, thr NUMERIC)
+RETURNS TABLE (
+    id                    UUID,
+    item_name             VARCHAR(255),
+    sale_price            NUMERIC(10,2),
+    food_cost             NUMERIC(10,2),
+    food_cost_percent     NUMERIC(5,2),
+    profitability_tier    VARCHAR(20)
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT m.id,
+           m.item_name,
+           m.sale_price,
+           m.food_cost,
+           m.food_cost_percent,
+           m.profitability_tier
+      FROM public.menu_items m
+     WHERE m.restaurant_id = rid
+       AND m.is_active = TRUE
+       AND m.food_cost_percent > thr
+     ORDER BY m.food_cost_percent DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.unprofitable_items(INTEGER, NUMERIC) TO anon, authenticated, service_role;
@@ -0,0 +1,62 @@
+-- ============================================================================
+-- Migration 011: Recent Context RPC
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - recent_context(rid, want_invoices, want_watch, want_report)
+--       : Recent invoices, watchlist count and latest report as one JSONB
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- RECENT CONTEXT
+-- Backs the per-message DB context injected into the system prompt. One
+-- round-trip and one decode instead of three SELECTs; sections the intent
+-- does not need are skipped and come back NULL.
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.recent_context(
+    rid             INTEGER,
+    want_invoices   BOOLEAN,
+    want_watch      BOOLEAN,
+    want_report     BOOLEAN
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'invoices', inv.rows,
+        'watch_count', w.n,
+        'latest_report', rep.row
+    )
+      FROM (SELECT 1) AS one
+      LEFT JOIN LATERAL (
+            SELECT jsonb_agg(i ORDER BY i.invoice_date DESC) AS rows
+              FROM (
+                    SELECT supplier_name_extracted, invoice_date, total_amount
+                      FROM public.invoices
+                     WHERE restaurant_id = rid
+                     ORDER BY invoice_date DESC
+                     LIMIT 5
+                   ) i
+             WHERE want_invoices
+      ) inv ON TRUE
+      LEFT JOIN LATERAL (
+            SELECT COUNT(*) AS n
+              FROM public.product_price_watchlist
+             WHERE restaurant_id = rid
+               AND is_active = TRUE
+      ) w ON want_watch
+      LEFT JOIN LATERAL (
+            SELECT to_jsonb(r) AS row
+              FROM (
+                    SELECT report_month, report_year, cmv_percent, status
+                      FROM public.monthly_financial_reports
+                     WHERE restaurant_id = rid
+                     ORDER BY report_year DESC, report_month DESC
+                     LIMIT 1
+                   ) r
+             WHERE want_report
+      ) rep ON TRUE;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.recent_context(INTEGER, BOOLEAN, BOOLEAN, BOOLEAN) TO anon, authenticated, service_role;
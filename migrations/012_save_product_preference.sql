@@ -0,0 +1,121 @@
+-- ============================================================================
+-- Migration 012: Save Product Preference RPC
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - find_master_list_id(rid, product) : Exact match first, LIKE on miss
+--   - save_product_preference(rid, product, prefs, ml DEFAULT NULL)
+--       : Resolve the product, upsert its preference, mark the queue entry
+--
+-- References existing procurement tables:
+--   master_list(id), restaurant_product_preferences,
+--   preference_collection_queue
+--
+-- master_list is owned by the procurement agent and is read-only from
+-- finance, so this migration does not alter it. The exact match compares
+-- lower(product_name); it is index-served once procurement adds
+--   CREATE INDEX CONCURRENTLY idx_master_list_restaurant_name_lower
+--       ON public.master_list(restaurant_id, lower(product_name));
+-- in its own migrations.
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- FIND MASTER LIST ID
+-- Most lookups name the product exactly, so try the exact match first and
+-- only fall back to the substring match on a miss.
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.find_master_list_id(rid INTEGER, product TEXT)
+RETURNS BIGINT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(
+        (SELECT m.id
+           FROM public.master_list m
+          WHERE m.restaurant_id = rid
+            AND lower(m.product_name) = lower(product)
+          LIMIT 1),
+        (SELECT m.id
+           FROM public.master_list m
+          WHERE m.restaurant_id = rid
+            AND lower(m.product_name) LIKE '%' || lower(product) || '%'
+          LIMIT 1)
+    );
+$$;
+
+GRANT EXECUTE ON FUNCTION public.find_master_list_id(INTEGER, TEXT) TO anon, authenticated, service_role;
+
+-- ---------------------------------------------------------------------------
+-- SAVE PRODUCT PREFERENCE
+-- Replaces four sequential PostgREST calls (master_list lookup, preference
+-- select, preference insert/update, queue update) with one transaction.
+-- `prefs` holds only the preference columns being set (e.g.
+-- brand_preferences, brand_preferences_source, brand_preferences_added_at);
+-- jsonb_populate_record casts each value to its column type and columns
+-- absent from `prefs` keep their current value on update.
+-- The product resolves through find_master_list_id unless the caller already
+-- has its id and passes it as `ml`.
+-- Returns the matched master_list id, or NULL if the product is unknown.
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.save_product_preference(
+    rid       INTEGER,
+    product   TEXT,
+    prefs     JSONB,
+    ml        BIGINT DEFAULT NULL
+)
+RETURNS BIGINT
+LANGUAGE plpgsql
+VOLATILE
+AS $$
+DECLARE
+    ml_id   BIGINT;
+    p       public.restaurant_product_preferences;
+BEGIN
+    ml_id := COALESCE(ml, public.find_master_list_id(rid, product));
+
+    IF ml_id IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF prefs <> '{}'::jsonb THEN
+        p := jsonb_populate_record(NULL::public.restaurant_product_preferences, prefs);
+
+        UPDATE public.restaurant_product_preferences t
+           SET brand_preferences            = CASE WHEN prefs ? 'brand_preferences'            THEN p.brand_preferences            ELSE t.brand_preferences END,
+               brand_preferences_source     = CASE WHEN prefs ? 'brand_preferences_source'     THEN p.brand_preferences_source     ELSE t.brand_preferences_source END,
+               brand_preferences_added_at   = CASE WHEN prefs ? 'brand_preferences_added_at'   THEN p.brand_preferences_added_at   ELSE t.brand_preferences_added_at END,
+               price_preference             = CASE WHEN prefs ? 'price_preference'             THEN p.price_preference             ELSE t.price_preference END,
+               price_preference_source      = CASE WHEN prefs ? 'price_preference_source'      THEN p.price_preference_source      ELSE t.price_preference_source END,
+               price_preference_added_at    = CASE WHEN prefs ? 'price_preference_added_at'    THEN p.price_preference_added_at    ELSE t.price_preference_added_at END,
+               quality_preference           = CASE WHEN prefs ? 'quality_preference'           THEN p.quality_preference           ELSE t.quality_preference END,
+               quality_preference_source    = CASE WHEN prefs ? 'quality_preference_source'    THEN p.quality_preference_source    ELSE t.quality_preference_source END,
+               quality_preference_added_at  = CASE WHEN prefs ? 'quality_preference_added_at'  THEN p.quality_preference_added_at  ELSE t.quality_preference_added_at END,
+               is_active                    = TRUE
+         WHERE t.restaurant_id = rid
+           AND t.master_list_id = ml_id;
+
+        IF NOT FOUND THEN
+            INSERT INTO public.restaurant_product_preferences (
+                restaurant_id, master_list_id, is_active,
+                brand_preferences, brand_preferences_source, brand_preferences_added_at,
+                price_preference, price_preference_source, price_preference_added_at,
+                quality_preference, quality_preference_source, quality_preference_added_at
+            ) VALUES (
+                rid, ml_id, TRUE,
+                p.brand_preferences, p.brand_preferences_source, p.brand_preferences_added_at,
+                p.price_preference, p.price_preference_source, p.price_preference_added_at,
+                p.quality_preference, p.quality_preference_source, p.quality_preference_added_at
+            );
+        END IF;
+    END IF;
+
+    UPDATE public.preference_collection_queue q
+       SET preference_status = 'collected'
+     WHERE q.restaurant_id = rid
+       AND q.master_list_id = ml_id;
+
+    RETURN ml_id;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.save_product_preference(INTEGER, TEXT, JSONB, BIGINT) TO anon, authenticated, service_role;
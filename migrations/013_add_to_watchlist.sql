@@ -0,0 +1,52 @@
+-- ============================================================================
+-- Migration 013: Add To Watchlist RPC
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - add_to_watchlist(rid, product, alert, threshold, target)
+--       : Resolve the product and insert its watchlist entry
+--
+-- References existing procurement tables:
+--   master_list(id), product_price_watchlist
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- ADD TO WATCHLIST
+-- Replaces the master_list search plus insert with a single INSERT ... SELECT.
+-- The product resolves through find_master_list_id (migration 012): exact
+-- name first, substring match on a miss. Returns the new entry with the
+-- matched product name, or NULL when the product is not on the master list.
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.add_to_watchlist(
+    rid         INTEGER,
+    product     TEXT,
+    alert       TEXT,
+    threshold   NUMERIC DEFAULT NULL,
+    target      NUMERIC DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+VOLATILE
+AS $$
+    WITH ml AS (
+        SELECT m.id, m.product_name
+          FROM public.master_list m
+         WHERE m.id = public.find_master_list_id(rid, product)
+    ), w AS (
+        INSERT INTO public.product_price_watchlist
+               (restaurant_id, master_list_id, alert_type,
+                threshold_percent, target_price, is_active)
+        SELECT rid, ml.id, alert, threshold, target, TRUE
+          FROM ml
+        RETURNING id, master_list_id
+    )
+    SELECT jsonb_build_object(
+               'watchlist_id', w.id,
+               'master_list_id', w.master_list_id,
+               'product_name', ml.product_name
+           )
+      FROM w
+      JOIN ml ON ml.id = w.master_list_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.add_to_watchlist(INTEGER, TEXT, TEXT, NUMERIC, NUMERIC) TO anon, authenticated, service_role;
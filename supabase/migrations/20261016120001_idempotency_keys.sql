@@ -0,0 +1,17 @@
+-- ============================================================================
+-- Migration 006: Idempotency Keys
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Adds:
+--   - invoices.idempotency_key : set by parse_invoice_photo (chat id + photo URL)
+--
+-- insert_keyed() upserts with ON CONFLICT (idempotency_key) DO NOTHING, so a
+-- write retried after a 429/503, or the same photo sent twice, cannot create
+-- a duplicate row. NULL keys never conflict.
+-- ============================================================================
+
+ALTER TABLE public.invoices
+    ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_invoices_idempotency_key
+    ON public.invoices(idempotency_key);
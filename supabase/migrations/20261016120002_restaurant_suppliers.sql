@@ -0,0 +1,35 @@
+-- ============================================================================
+-- Migration 007: Restaurant Suppliers RPC
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - get_restaurant_suppliers(rid) : One row per supplier seen on invoices
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- GET RESTAURANT SUPPLIERS
+-- Deduplicates suppliers in Postgres so only unique names cross the wire,
+-- instead of fetching every invoice and collapsing them client-side.
+-- The earliest invoice wins for each supplier name.
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.get_restaurant_suppliers(rid INTEGER)
+RETURNS TABLE (
+    supplier_name_extracted   VARCHAR(255),
+    supplier_cnpj_extracted   VARCHAR(20),
+    users_seller_id           INTEGER
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT DISTINCT ON (i.supplier_name_extracted)
+           i.supplier_name_extracted,
+           i.supplier_cnpj_extracted,
+           i.users_seller_id
+      FROM public.invoices i
+     WHERE i.restaurant_id = rid
+       AND i.supplier_name_extracted IS NOT NULL
+       AND i.supplier_name_extracted <> ''
+     ORDER BY i.supplier_name_extracted, i.created_at;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_restaurant_suppliers(INTEGER) TO anon, authenticated, service_role;
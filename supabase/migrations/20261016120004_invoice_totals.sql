@@ -0,0 +1,29 @@
+-- ============================================================================
+-- Migration 009: Invoice Totals RPC
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - invoice_total_since(rid, cutoff) : Invoice count and summed total
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- INVOICE TOTAL SINCE
+-- Aggregates invoices dated on/after `cutoff` so get_invoice_summary does not
+-- have to download every invoice just to add up total_amount.
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.invoice_total_since(rid INTEGER, cutoff DATE)
+RETURNS TABLE (
+    invoice_count   BIGINT,
+    total_amount    NUMERIC
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COUNT(*),
+           COALESCE(SUM(i.total_amount), 0)
+      FROM public.invoices i
+     WHERE i.restaurant_id = rid
+       AND i.invoice_date >= cutoff;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.invoice_total_since(INTEGER, DATE) TO anon, authenticated, service_role;
@@ -0,0 +1,29 @@
+-- ============================================================================
+-- Migration 010: Start Monthly Report RPC
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Creates:
+--   - start_monthly_report(rid, yr, mon) : Get-or-create a monthly report
+-- ============================================================================
+
+-- ---------------------------------------------------------------------------
+-- START MONTHLY REPORT
+-- Single round-trip, race-free replacement for "select, then insert if
+-- missing". The conflict branch is a no-op update so RETURNING still yields
+-- the existing row untouched; `created` is true only for a fresh insert
+-- (xmax = 0 on a newly inserted tuple).
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.start_monthly_report(rid INTEGER, yr INTEGER, mon INTEGER)
+RETURNS JSONB
+LANGUAGE sql
+VOLATILE
+AS $$
+    INSERT INTO public.monthly_financial_reports AS r
+           (restaurant_id, report_year, report_month, status)
+    VALUES (rid, yr, mon, 'awaiting_revenue')
+    ON CONFLICT (restaurant_id, report_year, report_month)
+    DO UPDATE SET updated_at = r.updated_at
+    RETURNING to_jsonb(r) || jsonb_build_object('created', r.xmax = 0);
+$$;
+
+GRANT EXECUTE ON FUNCTION public.start_monthly_report(INTEGER, INTEGER, INTEGER) TO anon, authenticated, service_role;
@@ -0,0 +1,28 @@
+-- ============================================================================
+-- Migration 014: One In-Progress Onboarding Per Chat
+-- Frepi Finance Agent - Supabase PostgreSQL
+--
+-- Adds:
+--   - unique (telegram_chat_id) on finance_onboarding WHERE status = 'in_progress'
+--
+-- save_onboarding_step updates the chat's in-progress session and inserts one
+-- only when none exists. The index makes that insert fail instead of creating
+-- a duplicate when two bot instances race, and the loser retries the update.
+-- ============================================================================
+
+-- Keep only the newest in-progress session per chat so the index can build
+UPDATE public.finance_onboarding f
+   SET status = 'abandoned',
+       updated_at = NOW()
+ WHERE f.status = 'in_progress'
+   AND EXISTS (
+        SELECT 1
+          FROM public.finance_onboarding n
+         WHERE n.telegram_chat_id = f.telegram_chat_id
+           AND n.status = 'in_progress'
+           AND (n.created_at, n.id) > (f.created_at, f.id)
+   );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_finance_onboarding_chat_in_progress
+    ON public.finance_onboarding(telegram_chat_id)
+    WHERE status = 'in_progress';
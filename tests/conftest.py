@@ -0,0 +1,61 @@
+"""Shared pytest fixtures for the Frepi Finance Agent tests."""
+
+from functools import lru_cache
+from typing import Optional
+
+import pytest
+
+from frepi_finance.agent.intent_detector import (
+    detect_intent,
+    INTENT_GENERAL,
+    INTENT_INVOICE,
+    INTENT_MONTHLY,
+    INTENT_CMV,
+)
+from frepi_finance.agent.prompt_composer import compose_prompt, ComposedPrompt
+
+
+def _freeze(d: Optional[dict]) -> Optional[tuple]:
+    """Hashable form of an optional dict, for use as a cache key."""
+    return tuple(sorted(d.items())) if d else None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _prewarm_agent():
+    """
+    Exercise the intent detector and prompt composer once per session.
+
+    The first tests then start with the cached SOUL and skill components
+    built and the detector's regexes already used.
+    """
+    detect_intent("warm")
+    for intent in (INTENT_GENERAL, INTENT_INVOICE, INTENT_MONTHLY, INTENT_CMV):
+        compose_prompt(intent, 0.5)
+
+
+@pytest.fixture(scope="session")
+def cached_compose_prompt():
+    """
+    compose_prompt memoized for the whole test session.
+
+    Tests that only read the result can share one composition per distinct
+    input instead of rebuilding the SOUL template each time.
+    """
+    @lru_cache(maxsize=256)
+    def _compose(intent, confidence, memory_key, db_context, drip_context):
+        memory = dict(memory_key) if memory_key else None
+        return compose_prompt(intent, confidence, memory, db_context, drip_context)
+
+    def compose(
+        intent: str,
+        intent_confidence: float,
+        user_memory: Optional[dict] = None,
+        db_context: Optional[str] = None,
+        drip_context: Optional[str] = None,
+    ) -> ComposedPrompt:
+        return _compose(
+            intent, round(intent_confidence, 2), _freeze(user_memory),
+            db_context, drip_context,
+        )
+
+    return compose
@@ -12,91 +12,38 @@ from frepi_finance.agent.intent_detector import (
 )
 
 
-class TestInvoiceIntent:
-    def test_photo_triggers_invoice(self):
-        result = detect_intent("qualquer coisa", has_photo=True)
-        assert result.intent == INTENT_INVOICE
-        assert result.confidence >= 0.9
-
-    def test_nf_keyword(self):
-        result = detect_intent("Quero enviar uma NF")
-        assert result.intent == INTENT_INVOICE
-
-    def test_nota_fiscal(self):
-        result = detect_intent("Tenho uma nota fiscal para enviar")
-        assert result.intent == INTENT_INVOICE
-
-    def test_menu_option_1(self):
-        result = detect_intent("1")
-        assert result.intent == INTENT_INVOICE
-
-
-class TestMonthlyIntent:
-    def test_fechamento(self):
-        result = detect_intent("Quero fazer o fechamento do mês")
-        assert result.intent == INTENT_MONTHLY
-
-    def test_faturamento(self):
-        result = detect_intent("Meu faturamento foi R$ 80.000")
-        assert result.intent == INTENT_MONTHLY
-
-    def test_relatorio_mensal(self):
-        result = detect_intent("Preciso do relatório mensal")
-        assert result.intent == INTENT_MONTHLY
-
-    def test_menu_option_2(self):
-        result = detect_intent("2")
-        assert result.intent == INTENT_MONTHLY
-
-
-class TestCMVIntent:
-    def test_cmv_keyword(self):
-        result = detect_intent("Qual é o CMV do meu restaurante?")
-        assert result.intent == INTENT_CMV
-
-    def test_cardapio(self):
-        result = detect_intent("Quero analisar meu cardápio")
-        assert result.intent == INTENT_CMV
-
-    def test_prato(self):
-        result = detect_intent("Quanto custa o prato de picanha?")
-        assert result.intent == INTENT_CMV
-
-    def test_ficha_tecnica(self):
-        result = detect_intent("Preciso criar a ficha técnica")
-        assert result.intent == INTENT_CMV
-
-    def test_menu_option_3(self):
-        result = detect_intent("3")
-        assert result.intent == INTENT_CMV
-
-
-class TestWatchlistIntent:
-    def test_acompanhar(self):
-        result = detect_intent("Quero acompanhar o preço da picanha")
-        assert result.intent == INTENT_WATCHLIST
-
-    def test_monitorar(self):
-        result = detect_intent("Monitorar preço do arroz")
-        assert result.intent == INTENT_WATCHLIST
-
-    def test_menu_option_4(self):
-        result = detect_intent("4")
-        assert result.intent == INTENT_WATCHLIST
-
-
-class TestOnboardingIntent:
-    def test_new_user(self):
-        result = detect_intent("Olá", is_new_user=True)
-        assert result.intent == INTENT_ONBOARDING
-        assert result.confidence >= 0.9
-
-
-class TestGeneralIntent:
-    def test_greeting(self):
-        result = detect_intent("Olá, tudo bem?")
-        assert result.intent == INTENT_GENERAL
-
-    def test_random_question(self):
-        result = detect_intent("Como funciona o sistema?")
-        assert result.intent == INTENT_GENERAL
+# (message, has_photo, is_new_user, expected intent, minimum confidence)
+INTENT_CASES = [
+    # Invoice
+    pytest.param("qualquer coisa", True, False, INTENT_INVOICE, 0.9, id="photo_triggers_invoice"),
+    pytest.param("Quero enviar uma NF", False, False, INTENT_INVOICE, 0.0, id="nf_keyword"),
+    pytest.param("Tenho uma nota fiscal para enviar", False, False, INTENT_INVOICE, 0.0, id="nota_fiscal"),
+    pytest.param("1", False, False, INTENT_INVOICE, 0.0, id="menu_option_1"),
+    # Monthly closure
+    pytest.param("Quero fazer o fechamento do mês", False, False, INTENT_MONTHLY, 0.0, id="fechamento"),
+    pytest.param("Meu faturamento foi R$ 80.000", False, False, INTENT_MONTHLY, 0.0, id="faturamento"),
+    pytest.param("Preciso do relatório mensal", False, False, INTENT_MONTHLY, 0.0, id="relatorio_mensal"),
+    pytest.param("2", False, False, INTENT_MONTHLY, 0.0, id="menu_option_2"),
+    # CMV
+    pytest.param("Qual é o CMV do meu restaurante?", False, False, INTENT_CMV, 0.0, id="cmv_keyword"),
+    pytest.param("Quero analisar meu cardápio", False, False, INTENT_CMV, 0.0, id="cardapio"),
+    pytest.param("Quanto custa o prato de picanha?", False, False, INTENT_CMV, 0.0, id="prato"),
+    pytest.param("Preciso criar a ficha técnica", False, False, INTENT_CMV, 0.0, id="ficha_tecnica"),
+    pytest.param("3", False, False, INTENT_CMV, 0.0, id="menu_option_3"),
+    # Watchlist
+    pytest.param("Quero acompanhar o preço da picanha", False, False, INTENT_WATCHLIST, 0.0, id="acompanhar"),
+    pytest.param("Monitorar preço do arroz", False, False, INTENT_WATCHLIST, 0.0, id="monitorar"),
+    pytest.param("4", False, False, INTENT_WATCHLIST, 0.0, id="menu_option_4"),
+    # Onboarding
+    pytest.param("Olá", False, True, INTENT_ONBOARDING, 0.9, id="new_user"),
+    # General
+    pytest.param("Olá, tudo bem?", False, False, INTENT_GENERAL, 0.0, id="greeting"),
+    pytest.param("Como funciona o sistema?", False, False, INTENT_GENERAL, 0.0, id="random_question"),
+]
+
+
+@pytest.mark.parametrize("message,has_photo,is_new_user,intent,min_confidence", INTENT_CASES)
+def test_intent(message, has_photo, is_new_user, intent, min_confidence):
+    result = detect_intent(message, has_photo=has_photo, is_new_user=is_new_user)
+    assert result.intent == intent
+    assert result.confidence >= min_confidence
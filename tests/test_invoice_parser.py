@@ -1,23 +1,68 @@
 """Tests for invoice parser utility functions (no API calls)."""
 
+import json
+from types import MappingProxyType, SimpleNamespace
+
 import pytest
 from frepi_finance.soul.identity import format_brl, price_trend_arrow
 
 
-class TestPriceTrendArrow:
-    def test_price_increase(self):
-        result = price_trend_arrow(15.5)
-        assert "📈" in result
-        assert "15,5%" in result
+# 📈, 📉, ➡️
+UP, DOWN, FLAT = "\U0001F4C8", "\U0001F4C9", "\u27A1\uFE0F"
+
+# A valid parsed invoice, shared read-only across tests
+_VALID_INVOICE = MappingProxyType({
+    "supplier_name": "Friboi Direto",
+    "cnpj": "12.345.678/0001-90",
+    "items": (
+        MappingProxyType({
+            "product": "Picanha",
+            "quantity": 10.0,
+            "unit": "kg",
+            "unit_price": 42.90,
+            "total": 429.00,
+        }),
+    ),
+    "total": 429.00,
+})
+
+# GPT-4 Vision reply for a three-item invoice. Numbers arrive as the model
+# writes them, sometimes as strings.
+_VISION_REPLY = json.dumps({
+    "supplier_name": "Friboi Direto",
+    "supplier_cnpj": "12.345.678/0001-90",
+    "items": [
+        {"product_name": "Picanha", "quantity": "10", "unit": "kg",
+         "unit_price": "42.90", "total_price": "429.00"},
+        {"product_name": "Alcatra", "quantity": 5, "unit": "kg",
+         "unit_price": 30.0, "total_price": 150.0},
+        {"product_name": "Carvao", "quantity": 1, "unit_price": 75.5,
+         "total_price": 75.5},
+    ],
+    "total_amount": 654.50,
+})
 
-    def test_price_decrease(self):
-        result = price_trend_arrow(-8.3)
-        assert "📉" in result
-        assert "8,3%" in result  # negative sign handled by format_percent
 
-    def test_no_change(self):
-        result = price_trend_arrow(0)
-        assert "➡️" in result
+class TestPriceTrendArrow:
+    @pytest.mark.parametrize(
+        "change,arrow,percent",
+        [
+            (15.5, UP, "15,5%"),
+            (-8.3, DOWN, "8,3%"),  # negative sign handled by format_percent
+            (0, FLAT, None),
+            (0.04, FLAT, None),
+            (-0.04, FLAT, None),
+            (0.05, UP, "0,1%"),
+            (-0.05, DOWN, "0,1%"),
+            (float("nan"), FLAT, None),
+        ],
+        ids=["increase", "decrease", "no_change", "tiny_increase", "tiny_decrease",
+             "band_edge_up", "band_edge_down", "nan"],
+    )
+    def test_price_trend_arrow(self, change, arrow, percent):
+        result = price_trend_arrow(change)
+        assert arrow in result
+        assert percent is None or percent in result
 
 
 class TestInvoiceParsing:
@@ -25,50 +70,54 @@ class TestInvoiceParsing:
 
     def test_valid_invoice_structure(self):
         """A valid parsed invoice has required fields."""
-        invoice = {
-            "supplier_name": "Friboi Direto",
-            "cnpj": "12.345.678/0001-90",
-            "items": [
-                {
-                    "product": "Picanha",
-                    "quantity": 10.0,
-                    "unit": "kg",
-                    "unit_price": 42.90,
-                    "total": 429.00,
-                }
-            ],
-            "total": 429.00,
-        }
+        invoice = _VALID_INVOICE
         assert invoice["supplier_name"]
         assert len(invoice["items"]) > 0
         assert invoice["items"][0]["unit_price"] > 0
 
-    def test_line_item_total_calculation(self):
-        """Line item total = quantity * unit_price."""
-        quantity = 10.0
-        unit_price = 42.90
-        expected_total = 429.00
-        assert quantity * unit_price == pytest.approx(expected_total, rel=1e-2)
-
-    def test_invoice_total_is_sum_of_items(self):
-        """Invoice total should equal sum of line item totals."""
-        items = [
-            {"total": 429.00},
-            {"total": 150.00},
-            {"total": 75.50},
-        ]
-        total = sum(item["total"] for item in items)
-        assert total == pytest.approx(654.50, rel=1e-2)
-
-    def test_price_change_calculation(self):
-        """Price change percent = (new - old) / old * 100."""
-        old_price = 40.00
-        new_price = 42.90
-        change = (new_price - old_price) / old_price * 100
-        assert change == pytest.approx(7.25, rel=1e-2)
-
     def test_significant_change_threshold(self):
         """Changes >= 10% are considered significant."""
         threshold = 10.0
         change_pct = 12.5
         assert abs(change_pct) >= threshold
+
+
+@pytest.fixture
+async def parsed_invoice(monkeypatch):
+    """parse_invoice_image run against a canned GPT-4 Vision reply."""
+    invoice_parser = pytest.importorskip("frepi_finance.services.invoice_parser")
+
+    async def download_image_as_base64(image_url):
+        return "aW1hZ2U="
+
+    def create(**kwargs):
+        message = SimpleNamespace(content=_VISION_REPLY)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(invoice_parser, "download_image_as_base64", download_image_as_base64)
+    monkeypatch.setattr(invoice_parser, "get_openai_client", lambda: client)
+    monkeypatch.setattr(invoice_parser, "get_config", lambda: SimpleNamespace(chat_model="gpt-4o"))
+    return await invoice_parser.parse_invoice_image("https://t.me/file/nf.jpg")
+
+
+def _cents(value: float) -> int:
+    return round(value * 100)
+
+
+class TestParsedInvoiceArithmetic:
+    """Integer-cents checks on parse_invoice_image output."""
+
+    def test_line_item_totals(self, parsed_invoice):
+        """Each parsed line total = quantity * unit_price, to the cent."""
+        assert len(parsed_invoice.items) == 3
+        for item in parsed_invoice.items:
+            assert _cents(item.quantity * item.unit_price) == _cents(item.total_price)
+
+    def test_invoice_total_is_sum_of_items(self, parsed_invoice):
+        """The parsed invoice total equals the sum of its line totals, to the cent."""
+        line_cents = sum(_cents(item.total_price) for item in parsed_invoice.items)
+        assert _cents(parsed_invoice.total_amount) == line_cents == 65450
+
+    def test_missing_unit_defaults(self, parsed_invoice):
+        assert parsed_invoice.items[2].unit == "un"
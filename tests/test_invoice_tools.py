@@ -0,0 +1,133 @@
+"""Tests for invoice tools against an in-memory stand-in for PostgREST."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("postgrest")
+pytest.importorskip("openai")
+
+from frepi_finance.services import invoice_parser, price_trend  # noqa: E402
+from frepi_finance.shared import supabase_client  # noqa: E402
+from frepi_finance.shared.supabase_client import Tables, insert_keyed  # noqa: E402
+from frepi_finance.tools import invoice_tools  # noqa: E402
+from frepi_finance.tools.arg_models import (  # noqa: E402
+    ParseInvoicePhotoArgs,
+    ParseMultipleInvoicesArgs,
+)
+
+
+class _FakeQuery:
+    """Just enough of a PostgREST builder for keyed inserts and lookups."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.result: list[dict] = []
+
+    def upsert(self, data, on_conflict, ignore_duplicates):
+        if any(row.get(on_conflict) == data[on_conflict] for row in self.rows):
+            self.result = []
+        else:
+            row = {"id": len(self.rows) + 1, **data}
+            self.rows.append(row)
+            self.result = [row]
+        return self
+
+    def select(self, columns):
+        self.result = list(self.rows)
+        return self
+
+    def eq(self, column, value):
+        self.result = [row for row in self.result if row.get(column) == value]
+        return self
+
+    def limit(self, n):
+        self.result = self.result[:n]
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.result)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Table name -> rows, served through a fake Supabase client."""
+    tables: dict[str, list[dict]] = {}
+    client = SimpleNamespace(
+        table=lambda name: _FakeQuery(tables.setdefault(name, []))
+    )
+    monkeypatch.setattr(supabase_client, "get_supabase_client", lambda: client)
+    return tables
+
+
+class TestInsertKeyed:
+    async def test_same_key_twice_returns_existing_row(self, fake_db):
+        first, created = await insert_keyed(Tables.INVOICES, {"total_amount": 10}, "k1")
+        again, created_again = await insert_keyed(Tables.INVOICES, {"total_amount": 99}, "k1")
+
+        assert created is True
+        assert created_again is False
+        assert again == first
+        assert len(fake_db[Tables.INVOICES]) == 1
+
+
+class TestParseInvoicePhoto:
+    async def test_same_photo_twice_stores_items_once(self, fake_db, monkeypatch):
+        parsed = {
+            "supplier_name": "Friboi Direto",
+            "total_amount": 429.0,
+            "items": [{"product_name": "Picanha", "quantity": 10, "unit_price": 42.9}],
+        }
+        inserted_batches = []
+        trend_runs = []
+
+        async def parse_invoice_image(url):
+            return parsed
+
+        async def insert_many(table, rows):
+            inserted_batches.append(rows)
+            fake_db.setdefault(table, []).extend(rows)
+            return rows
+
+        async def compute_trends_for_invoice(invoice_id, restaurant_id):
+            trend_runs.append(invoice_id)
+            return []
+
+        monkeypatch.setattr(invoice_parser, "parse_invoice_image", parse_invoice_image)
+        monkeypatch.setattr(invoice_tools, "insert_many", insert_many)
+        monkeypatch.setattr(price_trend, "compute_trends_for_invoice", compute_trends_for_invoice)
+
+        session = SimpleNamespace(
+            restaurant_id=1, telegram_chat_id=42, current_invoice_id=None
+        )
+        args = ParseInvoicePhotoArgs(image_url="https://t.me/file/nf.jpg")
+
+        first = await invoice_tools.execute_invoice_tool("parse_invoice_photo", args, session)
+        second = await invoice_tools.execute_invoice_tool("parse_invoice_photo", args, session)
+
+        assert second["invoice_id"] == first["invoice_id"]
+        assert second["duplicate"] is True
+        assert len(inserted_batches) == 1
+        assert trend_runs == [first["invoice_id"]]
+        assert len(fake_db[Tables.INVOICE_LINE_ITEMS]) == 1
+
+
+class TestParseMultipleInvoices:
+    async def test_failed_invoices_are_reported_and_logged(self, monkeypatch, caplog):
+        async def parse_invoice_image(url):
+            if "bad" in url:
+                raise RuntimeError("vision timeout")
+            return {"supplier_name": "Friboi Direto"}
+
+        monkeypatch.setattr(invoice_parser, "parse_invoice_image", parse_invoice_image)
+        urls = ["https://t.me/file/ok.jpg", "https://t.me/file/bad.jpg"]
+
+        result = await invoice_tools.execute_invoice_tool(
+            "parse_multiple_invoices", ParseMultipleInvoicesArgs(image_urls=urls), None
+        )
+
+        assert result["parsed_count"] == 1
+        assert result["failed_count"] == 1
+        assert result["failed_urls"] == ["https://t.me/file/bad.jpg"]
+        assert "vision timeout" in caplog.text
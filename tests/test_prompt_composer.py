@@ -11,8 +11,8 @@ from frepi_finance.agent.intent_detector import (
 
 
 class TestPromptComposition:
-    def test_general_intent_has_soul_only(self):
-        result = compose_prompt(INTENT_GENERAL, 0.5)
+    def test_general_intent_has_soul_only(self, cached_compose_prompt):
+        result = cached_compose_prompt(INTENT_GENERAL, 0.5)
         assert isinstance(result, ComposedPrompt)
         assert result.detected_intent == INTENT_GENERAL
         # Should have only SOUL component
@@ -48,11 +48,11 @@ class TestPromptComposition:
         result = compose_prompt(INTENT_CMV, 0.85)
         assert result.total_token_estimate > 0
 
-    def test_system_message_not_empty(self):
-        result = compose_prompt(INTENT_GENERAL, 0.5)
+    def test_system_message_not_empty(self, cached_compose_prompt):
+        result = cached_compose_prompt(INTENT_GENERAL, 0.5)
         assert len(result.system_message) > 100
 
-    def test_hash_computed(self):
-        result = compose_prompt(INTENT_GENERAL, 0.5)
+    def test_hash_computed(self, cached_compose_prompt):
+        result = cached_compose_prompt(INTENT_GENERAL, 0.5)
         assert result.prompt_hash != ""
         assert len(result.prompt_hash) == 16
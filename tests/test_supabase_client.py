@@ -0,0 +1,88 @@
+"""Tests for the PostgREST query helpers (no network)."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("postgrest")
+
+from frepi_finance.shared import supabase_client  # noqa: E402
+from frepi_finance.shared.supabase_client import _build_select, _filter_value  # noqa: E402
+
+
+class _RecordingQuery:
+    """Records the builder calls _build_select makes."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args):
+            self.calls.append((name, *args))
+            return self
+        return record
+
+
+def _calls(filters, columns="*"):
+    query = _RecordingQuery()
+    client = SimpleNamespace(table=lambda name: query)
+    _build_select(client, "invoices", filters, columns)
+    return query.calls
+
+
+class TestFilterValue:
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("picanha", "picanha"),
+            ("Coca-Cola", "Coca-Cola"),
+            (42, "42"),
+            (True, "true"),
+            (False, "false"),
+            (1.5, '"1.5"'),  # '.' is reserved
+            ("Arroz, 5kg", '"Arroz, 5kg"'),
+            ("Pao (frances)", '"Pao (frances)"'),
+            ("a:b", '"a:b"'),
+            ('Say "oi"', '"Say \\"oi\\""'),
+            ("C:\\tmp", '"C:\\\\tmp"'),
+        ],
+        ids=["plain", "dash", "int", "true", "false", "float", "comma", "parens",
+             "colon", "quotes", "backslash"],
+    )
+    def test_quoting(self, value, expected):
+        assert _filter_value(value) == expected
+
+
+class TestBuildSelect:
+    def test_no_filters(self):
+        assert _calls(None, "id") == [("select", "id")]
+
+    def test_single_filter_is_chained(self):
+        assert _calls({"restaurant_id": 7}) == [("select", "*"), ("eq", "restaurant_id", 7)]
+
+    def test_single_list_filter_is_in(self):
+        assert _calls({"id": [1, 2]}) == [("select", "*"), ("in_", "id", [1, 2])]
+
+    def test_single_none_filter_is_null(self):
+        assert _calls({"closed_at": None}) == [("select", "*"), ("is_", "closed_at", "null")]
+
+    def test_combined_filters(self):
+        calls = _calls({
+            "restaurant_id": 7,
+            "status": "in progress",
+            "is_active": True,
+            "id": ["a,b", 3],
+            "closed_at": None,
+        })
+        assert calls == [
+            ("select", "*"),
+            ("or_", 'and(restaurant_id.eq.7,status.eq."in progress",is_active.eq.true,'
+                    'id.in.("a,b",3),closed_at.is.null)'),
+        ]
+
+    def test_chained_when_combining_disabled(self, monkeypatch):
+        monkeypatch.setattr(supabase_client, "COMBINE_FILTERS", False)
+        assert _calls({"restaurant_id": 7, "id": [1]}) == [
+            ("select", "*"), ("eq", "restaurant_id", 7), ("in_", "id", [1]),
+        ]
@@ -0,0 +1,30 @@
+"""Tests for the shared date helpers."""
+
+from datetime import date
+
+import pytest
+from frepi_finance.shared.time_utils import months_ago
+
+
+class TestMonthsAgo:
+    @pytest.mark.parametrize(
+        "months,today,expected",
+        [
+            (0, date(2026, 5, 15), date(2026, 5, 15)),
+            (1, date(2026, 5, 15), date(2026, 4, 15)),
+            (1, date(2026, 3, 31), date(2026, 2, 28)),  # clamped to month end
+            (1, date(2028, 3, 31), date(2028, 2, 29)),  # leap year
+            (1, date(2026, 5, 31), date(2026, 4, 30)),
+            (2, date(2026, 1, 15), date(2025, 11, 15)),  # wraps the year
+            (1, date(2026, 1, 31), date(2025, 12, 31)),
+            (12, date(2026, 2, 28), date(2025, 2, 28)),
+            (24, date(2028, 2, 29), date(2026, 2, 28)),
+        ],
+        ids=["zero", "one", "clamp", "leap", "clamp_30", "year_wrap", "december",
+             "twelve", "leap_day_back"],
+    )
+    def test_months_ago(self, months, today, expected):
+        assert months_ago(months, today) == expected
+
+    def test_defaults_to_today(self):
+        assert months_ago(0) == date.today()
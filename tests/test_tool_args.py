@@ -0,0 +1,71 @@
+"""Tests for tool argument models and their parsing in the dispatcher."""
+
+from dataclasses import MISSING, fields
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("postgrest")
+
+from frepi_finance.tools import ALL_TOOLS, execute_tool  # noqa: E402
+from frepi_finance.tools.arg_models import (  # noqa: E402
+    ARG_MODELS,
+    AddMenuItemArgs,
+    CMVHistoryArgs,
+    parse_args,
+)
+
+_SCHEMAS = {tool["function"]["name"]: tool["function"]["parameters"] for tool in ALL_TOOLS}
+
+
+class TestArgModelsMatchSchemas:
+    def test_every_tool_has_a_model(self):
+        assert set(ARG_MODELS) == set(_SCHEMAS)
+
+    @pytest.mark.parametrize("tool_name", sorted(ARG_MODELS))
+    def test_fields_and_required(self, tool_name):
+        schema = _SCHEMAS[tool_name]
+        model_fields = {f.name: f for f in fields(ARG_MODELS[tool_name])}
+        required = {name for name, f in model_fields.items() if f.default is MISSING}
+
+        assert set(model_fields) == set(schema.get("properties", {}))
+        assert required == set(schema.get("required", []))
+
+    @pytest.mark.parametrize("tool_name", sorted(ARG_MODELS))
+    def test_defaults_match_schema(self, tool_name):
+        model_fields = {f.name: f for f in fields(ARG_MODELS[tool_name])}
+        for name, spec in _SCHEMAS[tool_name].get("properties", {}).items():
+            if "default" in spec:
+                assert model_fields[name].default == spec["default"], name
+
+
+class TestParseArgs:
+    def test_fills_defaults(self):
+        assert parse_args("get_cmv_history", {}) == CMVHistoryArgs(
+            menu_item_id=None, granularity="monthly", months=6
+        )
+
+    def test_drops_unknown_keys(self):
+        args = parse_args("add_menu_item", {"item_name": "X-Burger", "sale_price": 32.0, "foo": 1})
+        assert args == AddMenuItemArgs(item_name="X-Burger", sale_price=32.0)
+
+    def test_missing_required_raises(self):
+        with pytest.raises(TypeError):
+            parse_args("add_menu_item", {"item_name": "X-Burger"})
+
+    @pytest.mark.parametrize("args", [None, [], "item_name", 3])
+    def test_non_object_raises(self, args):
+        with pytest.raises(TypeError):
+            parse_args("add_menu_item", args)
+
+
+class TestExecuteToolBadArgs:
+    @pytest.mark.parametrize(
+        "args",
+        [None, ["X-Burger"], {"item_name": "X-Burger"}],
+        ids=["null", "array", "missing_required"],
+    )
+    async def test_returns_error_result(self, args):
+        result = await execute_tool("add_menu_item", args, SimpleNamespace())
+        assert result["error"].startswith("Invalid arguments for add_menu_item")
@@ -0,0 +1,41 @@
+"""Tests for the in-process TTL cache."""
+
+from frepi_finance.shared import ttl_cache
+from frepi_finance.shared.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    def test_get_set(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+    def test_missing_returns_default(self):
+        assert TTLCache().get("nope", "x") == "x"
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_expired_entry_is_dropped(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+        cache = TTLCache(ttl=10)
+        cache.set("a", 1)
+        now[0] += 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_pop_and_clear(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.pop("a") == 1
+        cache.clear()
+        assert len(cache) == 0